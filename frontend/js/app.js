@@ -1,6 +1,9 @@
 const RAW_BASE_URL = (window.APP_CONFIG && window.APP_CONFIG.apiBaseUrl) || '';
 const API_BASE = RAW_BASE_URL.endsWith('/') ? RAW_BASE_URL.slice(0, -1) : RAW_BASE_URL;
+const UPLOAD_CONCURRENCY = 4;
 let recentUploads = [];
+let searchCursor = null;
+let searchResultsShown = [];
 let authToken = localStorage.getItem('authToken') || '';
 let currentUser = JSON.parse(localStorage.getItem('currentUser') || 'null');
 
@@ -241,25 +244,26 @@ async function uploadFile(file) {
 
   try {
     requireApiUrl();
-    toggleProgress(true, 'Converting file...');
-    const base64File = await fileToBase64(file);
-
-    toggleProgress(true, 'Uploading to API...');
-    const response = await fetch(`${API_BASE}/documents`, {
-      method: 'POST',
-      headers: { 
-        'Content-Type': 'application/json',
-        'Authorization': `Bearer ${authToken}`
-      },
-      body: JSON.stringify({ filename: file.name, base64File })
+    toggleProgress(true, 'Preparing upload...');
+    const session = await apiPost('/documents', {
+      filename: file.name,
+      size: file.size,
+      contentType: file.type || undefined
     });
 
-    if (!response.ok) {
-      const text = await response.text();
-      throw new Error(`Upload failed (${response.status}): ${text}`);
+    const onProgress = loaded => {
+      const percent = file.size ? Math.round((loaded / file.size) * 100) : 100;
+      setProgress(percent, `Uploading... ${percent}%`);
+    };
+    let parts = [];
+    if (session.uploadUrl) {
+      await putWithProgress(session.uploadUrl, file, onProgress);
+    } else {
+      parts = await uploadParts(file, session, onProgress);
     }
 
-    const data = await response.json();
+    setProgress(100, 'Finalizing...');
+    const data = await apiPost(`/documents/${session.documentId}/complete`, { parts });
     showUploadResult(true, `
       <h3>✅ Upload Successful!</h3>
       <p><strong>Document ID:</strong> ${data.documentId}</p>
@@ -280,21 +284,81 @@ async function uploadFile(file) {
   }
 }
 
+async function apiPost(path, body) {
+  const response = await fetch(`${API_BASE}${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${authToken}`
+    },
+    body: JSON.stringify(body)
+  });
+  if (!response.ok) {
+    const text = await response.text();
+    throw new Error(`Upload failed (${response.status}): ${text}`);
+  }
+  return response.json();
+}
+
+// Upload multipart chunks straight to S3, a few at a time
+async function uploadParts(file, session, onProgress) {
+  const { partSize, partUrls } = session;
+  const loadedByPart = new Array(partUrls.length).fill(0);
+  const parts = [];
+  let next = 0;
+
+  const worker = async () => {
+    while (next < partUrls.length) {
+      const index = next++;
+      const blob = file.slice(index * partSize, (index + 1) * partSize);
+      const etag = await putWithProgress(partUrls[index], blob, loaded => {
+        loadedByPart[index] = loaded;
+        onProgress(loadedByPart.reduce((sum, n) => sum + n, 0));
+      });
+      parts.push({ PartNumber: index + 1, ETag: etag });
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(UPLOAD_CONCURRENCY, partUrls.length) }, worker));
+  return parts.sort((a, b) => a.PartNumber - b.PartNumber);
+}
+
+// fetch() has no upload progress events, so presigned PUTs go through XHR
+function putWithProgress(url, blob, onProgress) {
+  return new Promise((resolve, reject) => {
+    const xhr = new XMLHttpRequest();
+    xhr.open('PUT', url);
+    xhr.upload.onprogress = e => {
+      if (e.lengthComputable) onProgress(e.loaded);
+    };
+    xhr.onload = () => {
+      if (xhr.status >= 200 && xhr.status < 300) {
+        onProgress(blob.size);
+        resolve(xhr.getResponseHeader('ETag'));
+      } else {
+        reject(new Error(`Upload failed (${xhr.status})`));
+      }
+    };
+    xhr.onerror = () => reject(new Error('Network error during upload'));
+    xhr.send(blob);
+  });
+}
+
 function toggleProgress(show, text = '') {
   const bar = document.getElementById('upload-progress');
-  const fill = document.getElementById('progress-fill');
-  const label = document.getElementById('progress-text');
   if (show) {
     bar.style.display = 'block';
-    label.textContent = text;
-    fill.style.width = text.includes('Uploading') ? '80%' : '30%';
+    setProgress(0, text);
   } else {
     bar.style.display = 'none';
-    fill.style.width = '0%';
-    label.textContent = '';
+    setProgress(0, '');
   }
 }
 
+function setProgress(percent, text) {
+  document.getElementById('progress-fill').style.width = `${percent}%`;
+  document.getElementById('progress-text').textContent = text;
+}
+
 function showUploadResult(success, html) {
   const box = document.getElementById('upload-result');
   box.innerHTML = html;
@@ -302,15 +366,6 @@ function showUploadResult(success, html) {
   box.style.display = 'block';
 }
 
-function fileToBase64(file) {
-  return new Promise((resolve, reject) => {
-    const reader = new FileReader();
-    reader.onload = () => resolve(reader.result.split(',')[1]);
-    reader.onerror = () => reject(new Error('File reading failed'));
-    reader.readAsDataURL(file);
-  });
-}
-
 function addToRecentUploads(upload) {
   recentUploads.unshift(upload);
   recentUploads = recentUploads.slice(0, 5);
@@ -352,7 +407,7 @@ function viewDocumentStatus(id) {
 }
 
 // --- Search ---
-async function searchDocuments() {
+async function searchDocuments(loadMore = false) {
   if (!authToken) {
     alert('Please login first');
     showAuthTab();
@@ -365,7 +420,11 @@ async function searchDocuments() {
     const category = document.getElementById('category-filter').value;
     const type = document.getElementById('type-filter').value;
 
-    document.getElementById('search-results').innerHTML = '<p class="text-muted">Searching...</p>';
+    if (!loadMore) {
+      searchCursor = null;
+      searchResultsShown = [];
+      document.getElementById('search-results').innerHTML = '<p class="text-muted">Searching...</p>';
+    }
 
     const params = new URLSearchParams();
     if (query) {
@@ -375,6 +434,8 @@ async function searchDocuments() {
     if (category) params.append('category', category);
     if (type) params.append('type', type.toLowerCase());
     params.append('limit', '50');
+    // Opaque cursor from the previous page; the server resumes from it
+    if (loadMore && searchCursor) params.append('cursor', searchCursor);
 
     const response = await fetch(`${API_BASE}/search?${params.toString()}`, {
       headers: {
@@ -382,8 +443,10 @@ async function searchDocuments() {
       }
     });
     if (!response.ok) throw new Error('Search request failed');
-    const { results = [] } = await response.json();
-    displaySearchResults(results);
+    const { results = [], nextCursor = null } = await response.json();
+    searchCursor = nextCursor;
+    searchResultsShown = searchResultsShown.concat(results);
+    displaySearchResults(searchResultsShown);
   } catch (err) {
     document.getElementById('search-results').innerHTML = `<p class="text-muted">Search failed: ${err.message}</p>`;
   }
@@ -420,6 +483,13 @@ function displaySearchResults(results) {
       `;
     })
     .join('');
+  if (searchCursor) {
+    container.innerHTML += `
+      <div style="text-align: center; margin-top: 15px;">
+        <button class="btn" onclick="searchDocuments(true)">Load more</button>
+      </div>
+    `;
+  }
 }
 
 // --- Status ---
@@ -15,6 +15,7 @@ from aws_cdk import (
     aws_lambda_event_sources as lambda_events,
     aws_s3 as s3,
     aws_s3_deployment as s3deploy,
+    aws_s3_notifications as s3n,
     aws_sns as sns,
     aws_sqs as sqs,
 )
@@ -36,6 +37,21 @@ class SmartDocProcessingStack(Stack):
             "DocumentsBucket",
             auto_delete_objects=True,
             removal_policy=RemovalPolicy.DESTROY,
+            # Browsers PUT file parts straight to S3 with presigned URLs and
+            # need the ETag header back to complete multipart uploads
+            cors=[
+                s3.CorsRule(
+                    allowed_methods=[s3.HttpMethods.PUT],
+                    allowed_origins=["*"],
+                    allowed_headers=["*"],
+                    exposed_headers=["ETag"],
+                )
+            ],
+            lifecycle_rules=[
+                s3.LifecycleRule(
+                    abort_incomplete_multipart_upload_after=Duration.days(1)
+                )
+            ],
         )
 
         documents_table = dynamodb.Table(
@@ -47,6 +63,50 @@ class SmartDocProcessingStack(Stack):
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             removal_policy=RemovalPolicy.DESTROY,
         )
+        documents_table.add_global_secondary_index(
+            index_name="UserUpdatedAtIndex",
+            partition_key=dynamodb.Attribute(
+                name="userId", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="updatedAt", type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL,
+        )
+
+        search_index_table = dynamodb.Table(
+            self,
+            "SearchIndexTable",
+            partition_key=dynamodb.Attribute(
+                name="userId", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="tokenDoc", type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+
+        content_hash_table = dynamodb.Table(
+            self,
+            "ContentHashTable",
+            partition_key=dynamodb.Attribute(
+                name="contentHash", type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+
+        llm_cache_table = dynamodb.Table(
+            self,
+            "LlmCacheTable",
+            partition_key=dynamodb.Attribute(
+                name="cacheKey", type=dynamodb.AttributeType.STRING
+            ),
+            time_to_live_attribute="expiresAt",
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+        )
 
         status_table = dynamodb.Table(
             self,
@@ -121,6 +181,7 @@ class SmartDocProcessingStack(Stack):
             path: str,
             env: dict[str, str],
             timeout: Duration = Duration.seconds(60),
+            memory_size: int = 128,
         ) -> lambda_.Function:
             fn = lambda_.Function(
                 self,
@@ -129,6 +190,7 @@ class SmartDocProcessingStack(Stack):
                 handler="handler.lambda_handler",
                 code=service_code(path),
                 timeout=timeout,
+                memory_size=memory_size,
                 environment=env,
             )
             return fn
@@ -138,7 +200,6 @@ class SmartDocProcessingStack(Stack):
             "upload_service",
             {
                 "DOCUMENTS_BUCKET": documents_bucket.bucket_name,
-                "EXTRACTION_QUEUE_URL": extraction_queue.queue_url,
                 "DOCUMENTS_TABLE": documents_table.table_name,
             },
         )
@@ -149,9 +210,15 @@ class SmartDocProcessingStack(Stack):
             {
                 "DOCUMENTS_BUCKET": documents_bucket.bucket_name,
                 "METADATA_QUEUE_URL": metadata_queue.queue_url,
+                "DOCUMENTS_TABLE": documents_table.table_name,
+                "CONTENT_HASH_TABLE": content_hash_table.table_name,
+                "LLM_CACHE_TABLE": llm_cache_table.table_name,
+                "EXTRACTION_CONCURRENCY": "5",
                 "OPENAI_API_KEY": OPENAI_API_KEY,
             },
             timeout=Duration.minutes(5),
+            # Five concurrent records each hold up to RANGE_READ_THRESHOLD bytes
+            memory_size=1024,
         )
 
         metadata_lambda = build_lambda(
@@ -159,6 +226,7 @@ class SmartDocProcessingStack(Stack):
             "metadata_service",
             {
                 "DOCUMENTS_TABLE": documents_table.table_name,
+                "SEARCH_INDEX_TABLE": search_index_table.table_name,
                 "CLASSIFICATION_QUEUE_URL": classification_queue.queue_url,
             },
         )
@@ -168,6 +236,10 @@ class SmartDocProcessingStack(Stack):
             "classification_service",
             {
                 "DOCUMENTS_TABLE": documents_table.table_name,
+                "SEARCH_INDEX_TABLE": search_index_table.table_name,
+                "CONTENT_HASH_TABLE": content_hash_table.table_name,
+                "LLM_CACHE_TABLE": llm_cache_table.table_name,
+                "CLASSIFICATION_BATCH_SIZE": "10",
                 "STATUS_QUEUE_URL": status_queue.queue_url,
                 "NOTIFICATION_QUEUE_URL": notification_queue.queue_url,
             },
@@ -184,7 +256,11 @@ class SmartDocProcessingStack(Stack):
         search_lambda = build_lambda(
             "SearchFunction",
             "search_service",
-            {"DOCUMENTS_TABLE": documents_table.table_name},
+            {
+                "DOCUMENTS_TABLE": documents_table.table_name,
+                "SEARCH_INDEX_TABLE": search_index_table.table_name,
+                "USER_DOCUMENTS_INDEX": "UserUpdatedAtIndex",
+            },
         )
 
         status_lambda = build_lambda(
@@ -222,20 +298,34 @@ class SmartDocProcessingStack(Stack):
 
         documents_bucket.grant_put(upload_lambda)
         documents_table.grant_read_write_data(upload_lambda)
-        extraction_queue.grant_send_messages(upload_lambda)
+
+        # Extraction is triggered by the object landing in S3, not by the uploader
+        documents_bucket.add_event_notification(
+            s3.EventType.OBJECT_CREATED,
+            s3n.SqsDestination(extraction_queue),
+            s3.NotificationKeyFilter(prefix="uploads/"),
+        )
 
         documents_bucket.grant_read(extraction_lambda)
+        documents_table.grant_read_data(extraction_lambda)
+        content_hash_table.grant_read_write_data(extraction_lambda)
+        llm_cache_table.grant_read_write_data(extraction_lambda)
         metadata_queue.grant_send_messages(extraction_lambda)
 
         documents_table.grant_read_write_data(metadata_lambda)
+        search_index_table.grant_read_write_data(metadata_lambda)
         classification_queue.grant_send_messages(metadata_lambda)
 
         documents_table.grant_read_write_data(classification_lambda)
+        search_index_table.grant_read_write_data(classification_lambda)
+        content_hash_table.grant_read_write_data(classification_lambda)
+        llm_cache_table.grant_read_write_data(classification_lambda)
         status_queue.grant_send_messages(classification_lambda)
         notification_queue.grant_send_messages(classification_lambda)
 
         notification_topic.grant_publish(notification_lambda)
         documents_table.grant_read_data(search_lambda)
+        search_index_table.grant_read_data(search_lambda)
         status_table.grant_read_write_data(status_lambda)
         status_queue.grant_consume_messages(status_lambda)
 
@@ -251,17 +341,32 @@ class SmartDocProcessingStack(Stack):
         classification_queue.grant_consume_messages(classification_lambda)
         notification_queue.grant_consume_messages(notification_lambda)
 
-        extraction_lambda.add_event_source(
-            lambda_events.SqsEventSource(extraction_queue)
+        def sqs_source(
+            queue: sqs.Queue,
+            batch_size: int = 10,
+            batching_window: Duration | None = None,
+        ) -> lambda_events.SqsEventSource:
+            # Handlers return batchItemFailures, so only failed records are redelivered
+            return lambda_events.SqsEventSource(
+                queue,
+                batch_size=batch_size,
+                max_batching_window=batching_window,
+                report_batch_item_failures=True,
+            )
+
+        extraction_lambda.add_event_source(sqs_source(extraction_queue, batch_size=5))
+        metadata_lambda.add_event_source(
+            sqs_source(metadata_queue, batching_window=Duration.seconds(2))
         )
-        metadata_lambda.add_event_source(lambda_events.SqsEventSource(metadata_queue))
         classification_lambda.add_event_source(
-            lambda_events.SqsEventSource(classification_queue)
+            sqs_source(classification_queue, batching_window=Duration.seconds(2))
         )
         notification_lambda.add_event_source(
-            lambda_events.SqsEventSource(notification_queue)
+            sqs_source(notification_queue, batching_window=Duration.seconds(5))
+        )
+        status_lambda.add_event_source(
+            sqs_source(status_queue, batching_window=Duration.seconds(5))
         )
-        status_lambda.add_event_source(lambda_events.SqsEventSource(status_queue))
 
         api = apigw.RestApi(
             self,
@@ -284,6 +389,12 @@ class SmartDocProcessingStack(Stack):
         # Document upload (requires authentication)
         documents_resource = api.root.add_resource("documents")
         documents_resource.add_method("POST", apigw.LambdaIntegration(upload_lambda))
+        upload_complete_resource = documents_resource.add_resource(
+            "{id}"
+        ).add_resource("complete")
+        upload_complete_resource.add_method(
+            "POST", apigw.LambdaIntegration(upload_lambda)
+        )
 
         # Search (requires authentication)
         search_resource = api.root.add_resource("search")
@@ -0,0 +1,75 @@
+"""One-off backfill of SearchIndexTable from DocumentsTable
+
+Documents written before the inverted index was deployed have no postings and
+no share in their owner's ``#stats`` row, so keyword search cannot find them and
+BM25 under-counts the corpus. Run once after deploying::
+
+    python scripts/backfill_search_index.py --documents-table <name> --index-table <name>
+
+Each document without ``termFreqs`` is claimed with a conditional write of its
+term statistics, then its postings and corpus stats are written the same way
+metadata_service does. Documents that already have ``termFreqs`` (indexed by the
+pipeline, or by an earlier run) are skipped, so the script can be re-run.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import Any, Dict
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "shared"))
+
+from search_index import document_term_stats, update_postings  # noqa: E402
+
+
+def backfill(documents_table: Any, index_table: Any, dry_run: bool = False) -> Dict[str, int]:
+    counts = {"scanned": 0, "indexed": 0, "skipped": 0}
+    kwargs: Dict[str, Any] = {}
+    while True:
+        resp = documents_table.scan(**kwargs)
+        for item in resp.get("Items", []):
+            counts["scanned"] += 1
+            if "termFreqs" in item or not item.get("userId"):
+                counts["skipped"] += 1
+                continue
+            term_freqs = document_term_stats(item)
+            if dry_run:
+                counts["indexed"] += 1
+                continue
+            try:
+                # Claim the document: a concurrent pipeline write wins and indexes it itself
+                documents_table.update_item(
+                    Key={"documentId": item["documentId"]},
+                    UpdateExpression="SET termFreqs=:terms",
+                    ConditionExpression="attribute_exists(documentId) AND attribute_not_exists(termFreqs)",
+                    ExpressionAttributeValues={":terms": term_freqs},
+                )
+            except documents_table.meta.client.exceptions.ConditionalCheckFailedException:
+                counts["skipped"] += 1
+                continue
+            update_postings(index_table, item["userId"], item["documentId"], term_freqs)
+            counts["indexed"] += 1
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return counts
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents-table", default=os.environ.get("DOCUMENTS_TABLE", "DocumentsTable"))
+    parser.add_argument("--index-table", default=os.environ.get("SEARCH_INDEX_TABLE", "SearchIndexTable"))
+    parser.add_argument("--dry-run", action="store_true", help="count documents without writing")
+    args = parser.parse_args()
+    dynamodb = boto3.resource("dynamodb")
+    counts = backfill(
+        dynamodb.Table(args.documents_table), dynamodb.Table(args.index_table), args.dry_run
+    )
+    print(" ".join(f"{name}={value}" for name, value in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
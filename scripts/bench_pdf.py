@@ -0,0 +1,168 @@
+"""Micro-benchmarks for the hot paths of the vendored PyPDF2
+
+Run from the repository root::
+
+    python scripts/bench_pdf.py png
+    python scripts/bench_pdf.py lzw
+    python scripts/bench_pdf.py content
+    python scripts/bench_pdf.py vector
+
+Each benchmark checks that the optimised code and a copy of the previous
+implementation (from ``tests/unit/pdf_reference.py``) produce the expected
+output, and reports the throughput of both.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "services", "extraction_service", "lib")
+)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PyPDF2 import filters  # noqa: E402
+from PyPDF2._page import TEXT_OPERATORS  # noqa: E402
+from PyPDF2.generic import ContentStream, DecodedStreamObject  # noqa: E402
+from tests.unit.pdf_reference import (  # noqa: E402
+    legacy_lzw_decode,
+    legacy_png_unpredict,
+    lzw_encode,
+    png_sample,
+)
+
+
+def _measure(name: str, func: Callable[[], Any], size: int, repeat: int) -> Any:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {name:<10} {size / best / 1e6:8.1f} MB/s")
+    return result
+
+
+def bench_png(args: argparse.Namespace) -> None:
+    columns = args.columns
+    implementations: Dict[str, Callable[[bytes, int], bytes]] = {
+        "python": filters._png_unpredict_python,
+        "legacy": legacy_png_unpredict,
+    }
+    if filters.np is not None:
+        implementations = {"numpy": filters._png_unpredict_numpy, **implementations}
+    else:
+        print("numpy not installed; the pure-Python path is used")
+    for label, filters_used in (("up", "2"), ("sub", "1"), ("paeth", "4"), ("mixed", "01234")):
+        data = png_sample(args.rows, columns, filters_used)
+        print(f"{label}: {args.rows} rows x {columns} columns")
+        outputs = {
+            name: _measure(name, lambda f=func: f(data, columns + 1), len(data), args.repeat)
+            for name, func in implementations.items()
+        }
+        if len(set(outputs.values())) != 1:
+            raise SystemExit(f"{label}: implementations disagree")
+
+
+def bench_lzw(args: argparse.Namespace) -> None:
+    rng = random.Random(0)
+    # Operators and strings typical of an old LZW-compressed content stream
+    tokens = [b"BT", b"ET", b"/F1 12 Tf", b"72 712 Td", b"(Quarterly report) Tj", b"T*", b"q", b"Q"]
+    samples = {
+        "content": b" ".join(rng.choice(tokens) for _ in range(args.size // 8)),
+        "random": bytes(rng.getrandbits(8) for _ in range(args.size)),
+    }
+    for label, plain in samples.items():
+        encoded = lzw_encode(plain)
+        print(f"{label}: {len(plain)} bytes, {len(encoded)} encoded")
+        for name, func in (("decoder", filters.LZWDecode.decode), ("legacy", legacy_lzw_decode)):
+            if _measure(name, lambda f=func: f(encoded), len(plain), args.repeat) != plain:
+                raise SystemExit(f"{label}: {name} does not round-trip")
+
+
+def _text_page(lines: int) -> bytes:
+    rng = random.Random(0)
+    words = [b"quarterly", b"revenue", b"grew", b"(see", b"note", b"4)", b"across", b"regions"]
+    out = [b"q 1 0 0 1 0 0 cm BT /F1 10 Tf 12 TL 72 760 Td"]
+    for line in range(lines):
+        chosen = [rng.choice(words).replace(b"(", b"\\(").replace(b")", b"\\)") for _ in range(8)]
+        if line % 2:
+            out.append(b"(" + b" ".join(chosen) + b") Tj T*")
+        else:
+            # Kerned line, as typeset by TeX and most word processors
+            kerned = b" ".join(b"(%s) %d" % (word, rng.randint(-300, 0)) for word in chosen)
+            out.append(b"[" + kerned + b"] TJ T*")
+        if line % 10 == 0:
+            out.append(b"/F2 9.5 Tf <0041004200430044> Tj 0 -14.4 Td (Footnote text) '")
+    out.append(b"ET Q")
+    return b"\n".join(out)
+
+
+def bench_content(args: argparse.Namespace) -> None:
+    stream = DecodedStreamObject()
+    stream.set_data(_text_page(args.lines))
+    size = len(stream.get_data())
+    print(f"content: {args.lines} text lines, {size} bytes")
+    operations = {}
+    for name, regex in (("regex", True), ("legacy", False)):
+        ContentStream.use_regex_tokenizer = regex
+        _measure(name, lambda: ContentStream(stream, None), size, args.repeat)
+        operations[name] = repr(ContentStream(stream, None).operations)
+    ContentStream.use_regex_tokenizer = True
+    if operations["regex"] != operations["legacy"]:
+        raise SystemExit("content: tokenizers disagree")
+
+
+def _drawing_page(segments: int) -> bytes:
+    rng = random.Random(0)
+    out = [b"q 0.5 w 0 0 0 RG"]
+    for segment in range(segments):
+        if segment % 50 == 0:
+            out.append(b"S %.3f %.3f %.3f rg %.2f %.2f m" % (rng.random(), rng.random(), rng.random(), rng.uniform(0, 600), rng.uniform(0, 800)))
+        out.append(b"%.2f %.2f %.2f %.2f %.2f %.2f c" % tuple(rng.uniform(0, 800) for _ in range(6)))
+    out.append(b"S Q BT /F1 8 Tf 40 20 Td (Drawing No. 1042 - Rev C) Tj ET")
+    return b"\n".join(out)
+
+
+def bench_vector(args: argparse.Namespace) -> None:
+    stream = DecodedStreamObject()
+    stream.set_data(_drawing_page(args.segments))
+    size = len(stream.get_data())
+    print(f"vector: {args.segments} path segments, {size} bytes")
+    full = _measure("all ops", lambda: ContentStream(stream, None), size, args.repeat)
+    text = _measure("text ops", lambda: ContentStream(stream, None, None, TEXT_OPERATORS), size, args.repeat)
+    expected = [(operands, op) for operands, op in full.operations if op in TEXT_OPERATORS]
+    if repr(text.operations) != repr(expected):
+        raise SystemExit("vector: filtered operations differ")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+    png = sub.add_parser("png", help="FlateDecode PNG predictors")
+    png.add_argument("--rows", type=int, default=512)
+    png.add_argument("--columns", type=int, default=1024)
+    png.add_argument("--repeat", type=int, default=3)
+    png.set_defaults(func=bench_png)
+    lzw = sub.add_parser("lzw", help="LZWDecode")
+    lzw.add_argument("--size", type=int, default=2_000_000)
+    lzw.add_argument("--repeat", type=int, default=3)
+    lzw.set_defaults(func=bench_lzw)
+    content = sub.add_parser("content", help="ContentStream tokenizing")
+    content.add_argument("--lines", type=int, default=2000)
+    content.add_argument("--repeat", type=int, default=3)
+    content.set_defaults(func=bench_content)
+    vector = sub.add_parser("vector", help="ContentStream restricted to text operators")
+    vector.add_argument("--segments", type=int, default=50_000)
+    vector.add_argument("--repeat", type=int, default=3)
+    vector.set_defaults(func=bench_vector)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
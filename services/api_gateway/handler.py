@@ -7,6 +7,7 @@ from typing import Any, Dict
 
 ROUTES = {
     ("POST", "/documents"): "upload_service",
+    ("POST", "/documents/{id}/complete"): "upload_service",
     ("GET", "/search"): "search_service",
     ("GET", "/status/{id}"): "status_service",
 }
@@ -0,0 +1,6 @@
+"""Shared vocabulary of document categories used by extraction and classification"""
+
+ALLOWED_CATEGORIES = [
+    "resume", "report", "article", "invoice", "contract",
+    "letter", "certificate", "legal", "presentation", "manual", "form"
+]
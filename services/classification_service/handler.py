@@ -1,67 +1,222 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
-import urllib.request
 from datetime import datetime
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
 
 import boto3
 
+from categories import ALLOWED_CATEGORIES
+from llm_cache import LlmCache
+from llm_client import LlmClient
+from local_model import LocalClassifier
+from search_index import document_term_stats, update_postings
+from sqs_batch import process_batch
+from sqs_producer import BufferedSqsProducer
+
+logger = logging.getLogger(__name__)
 
 dynamodb = boto3.resource("dynamodb")
 sqs = boto3.client("sqs")
+producer = BufferedSqsProducer(sqs)
+llm_cache = LlmCache()
 
 doc_table = dynamodb.Table(os.environ.get("DOCUMENTS_TABLE", "DocumentsTable"))
+index_table = dynamodb.Table(os.environ.get("SEARCH_INDEX_TABLE", "SearchIndexTable"))
+content_table = dynamodb.Table(os.environ.get("CONTENT_HASH_TABLE", "ContentHashTable"))
 status_queue = os.environ.get("STATUS_QUEUE_URL", "demo-status-queue")
 notification_queue = os.environ.get("NOTIFICATION_QUEUE_URL", "demo-notification-queue")
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
-ALLOWED_CATEGORIES = [
-    "resume", "report", "article", "invoice", "contract",
-    "letter", "certificate", "legal", "presentation", "manual", "form"
-]
+llm = LlmClient(OPENAI_API_KEY)
+# Metadata attributes the classifier actually looks at
+PROMPT_FIELDS = ("title", "summary", "keywords", "documentType", "filename")
+# Documents packed into one chat completion; 1 keeps one request per record
+CLASSIFICATION_BATCH_SIZE = int(os.environ.get("CLASSIFICATION_BATCH_SIZE", "1"))
+# Naive Bayes fast path (see local_model.py); below the threshold the LLM decides
+LOCAL_MODEL_PATH = os.environ.get(
+    "LOCAL_MODEL_PATH", str(Path(__file__).resolve().parent / "model" / "classifier.bin")
+)
+local_classifier = (
+    LocalClassifier.load(LOCAL_MODEL_PATH) if os.path.exists(LOCAL_MODEL_PATH) else None
+)
+# Overrides the threshold calibrated into the model file when set
+LOCAL_CONFIDENCE_THRESHOLD = (
+    float(os.environ["LOCAL_CONFIDENCE_THRESHOLD"])
+    if os.environ.get("LOCAL_CONFIDENCE_THRESHOLD")
+    else local_classifier.threshold if local_classifier is not None else None
+)
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    # LLM retries give up before the invocation times out, leaving time to fall back
+    llm.set_deadline(context)
+    prepared: Dict[str, Tuple[Dict[str, Any], Dict[str, str], str]] = {}
+    if CLASSIFICATION_BATCH_SIZE > 1:
+        prepared = prepare_batch(event.get("Records", []))
+    return process_batch(
+        event,
+        lambda record: process_record(record, prepared.get(record.get("messageId"))),
+        producer=producer,
+    )
+
+
+def process_record(
+    record: Dict[str, Any],
+    prepared: Tuple[Dict[str, Any], Dict[str, str], str] | None = None,
+) -> None:
+    body = json.loads(record["body"])
+    doc_id = body["documentId"]
+    if prepared is None:
+        metadata = load_metadata(body)
+        classification, source = classify(metadata)
+    else:
+        metadata, classification, source = prepared
+    if source == "ai" and metadata.get("contentHash") and metadata.get("userId"):
+        _remember_classification(metadata["userId"], metadata["contentHash"], classification)
+
+    term_freqs = document_term_stats({**metadata, "category": classification["category"]})
+    # ALL_OLD returns the stored postings, so a redelivered record diffs against
+    # what it wrote last time instead of the stats carried in the message
+    resp = doc_table.update_item(
+        Key={"documentId": doc_id},
+        UpdateExpression=(
+            "SET category=:cat, subcategory=:sub, classificationStatus=:status, "
+            "classificationSource=:source, #docStatus=:finalStatus, updatedAt=:ts, termFreqs=:terms"
+        ),
+        ExpressionAttributeNames={"#docStatus": "status"},
+        ExpressionAttributeValues={
+            ":cat": classification["category"],
+            ":sub": classification["subcategory"],
+            ":status": "completed",
+            ":source": source,
+            ":finalStatus": "completed",
+            ":ts": datetime.utcnow().isoformat(),
+            ":terms": term_freqs,
+        },
+        ReturnValues="ALL_OLD",
+    )
+    existing = resp.get("Attributes", {})
+    update_postings(
+        index_table,
+        existing.get("userId") or metadata.get("userId"),
+        doc_id,
+        term_freqs,
+        existing.get("termFreqs"),
+    )
+
+    status_event = {
+        "documentId": doc_id,
+        "status": "classification_completed",
+        "message": f"Classified as {classification['category']}",
+        "timestamp": int(datetime.utcnow().timestamp()),
+    }
+    message_id = record.get("messageId")
+    producer.send(status_queue, status_event, source=message_id)
+    producer.send(
+        notification_queue, {"documentId": doc_id, "status": "completed"}, source=message_id
+    )
+
 
+def load_metadata(body: Dict[str, Any]) -> Dict[str, Any]:
+    # Metadata normally rides along in the message; oversized items are read back
+    return body.get("metadata") or doc_table.get_item(
+        Key={"documentId": body["documentId"]}
+    ).get("Item", {})
 
-def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
-    for record in event.get("Records", []):
-        body = json.loads(record["body"])
-        doc_id = body["documentId"]
-        metadata = doc_table.get_item(Key={"documentId": doc_id}).get("Item", {})
 
-        classification = classify_with_ai(metadata)
+def classify(metadata: Dict[str, Any]) -> Tuple[Dict[str, str], str]:
+    """Cheapest source first: reused labels, local model, LLM, title heuristics"""
+    classification = reused_classification(metadata)
+    if classification is not None:
+        return classification, "reused"
+    classification = local_classification(metadata)
+    if classification is not None:
+        return classification, "local"
+    classification = classify_with_ai(metadata)
+    if classification is not None:
+        return classification, "ai"
+    return fallback_classification(metadata), "fallback"
+
+
+def prepare_batch(
+    records: List[Dict[str, Any]]
+) -> Dict[str, Tuple[Dict[str, Any], Dict[str, str], str]]:
+    """Classify an SQS batch up front, CLASSIFICATION_BATCH_SIZE documents per request
+
+    Maps messageId to (metadata, classification, source) as ``classify`` would.
+    Records that fail to load here are left out and fail again, on their own, in
+    process_record.
+    """
+    prepared: Dict[str, Tuple[Dict[str, Any], Dict[str, str], str]] = {}
+    pending: List[Tuple[str, str, Dict[str, Any]]] = []
+    for record in records:
+        try:
+            body = json.loads(record["body"])
+            metadata = load_metadata(body)
+        except Exception:
+            continue
+        classification, source = reused_classification(metadata), "reused"
         if classification is None:
-            classification = fallback_classification(metadata)
-
-        doc_table.update_item(
-            Key={"documentId": doc_id},
-            UpdateExpression=(
-                "SET category=:cat, subcategory=:sub, classificationStatus=:status, "
-                "#docStatus=:finalStatus, updatedAt=:ts"
-            ),
-            ExpressionAttributeNames={"#docStatus": "status"},
+            classification, source = local_classification(metadata), "local"
+        if classification is None:
+            pending.append((record["messageId"], body["documentId"], metadata))
+        else:
+            prepared[record["messageId"]] = (metadata, classification, source)
+
+    for start in range(0, len(pending), CLASSIFICATION_BATCH_SIZE):
+        chunk = pending[start:start + CLASSIFICATION_BATCH_SIZE]
+        labels = classify_batch_with_ai({doc_id: metadata for _, doc_id, metadata in chunk})
+        for message_id, doc_id, metadata in chunk:
+            if doc_id in labels:
+                prepared[message_id] = (metadata, labels[doc_id], "ai")
+            else:
+                # Missing or malformed entries degrade per item, not per batch
+                prepared[message_id] = (metadata, fallback_classification(metadata), "fallback")
+    return prepared
+
+
+def reused_classification(metadata: Dict[str, Any]) -> Dict[str, str] | None:
+    """Labels already present: copied from a duplicate or set by combined extraction"""
+    category = metadata.get("category")
+    if category not in ALLOWED_CATEGORIES or not metadata.get("subcategory"):
+        return None
+    return {"category": category, "subcategory": metadata["subcategory"]}
+
+
+def local_classification(metadata: Dict[str, Any]) -> Dict[str, str] | None:
+    """Naive Bayes prediction, only when it clears LOCAL_CONFIDENCE_THRESHOLD"""
+    if local_classifier is None:
+        return None
+    category, confidence = local_classifier.predict(metadata)
+    if category not in ALLOWED_CATEGORIES or confidence < LOCAL_CONFIDENCE_THRESHOLD:
+        return None
+    return {
+        "category": category,
+        "subcategory": local_classifier.subcategories.get(category, category),
+    }
+
+
+def _remember_classification(
+    user_id: str, content_hash: str, classification: Dict[str, str]
+) -> None:
+    try:
+        # Same per-tenant key as extraction_service._content_key
+        content_table.update_item(
+            Key={"contentHash": f"{user_id}#{content_hash}"},
+            UpdateExpression="SET category=:cat, subcategory=:sub",
+            ConditionExpression="attribute_exists(contentHash)",
             ExpressionAttributeValues={
                 ":cat": classification["category"],
                 ":sub": classification["subcategory"],
-                ":status": "completed",
-                ":finalStatus": "completed",
-                ":ts": datetime.utcnow().isoformat(),
             },
         )
-
-        status_event = {
-            "documentId": doc_id,
-            "status": "classification_completed",
-            "message": f"Classified as {classification['category']}",
-            "timestamp": int(datetime.utcnow().timestamp()),
-        }
-        sqs.send_message(QueueUrl=status_queue, MessageBody=json.dumps(status_event))
-        sqs.send_message(
-            QueueUrl=notification_queue,
-            MessageBody=json.dumps({"documentId": doc_id, "status": "completed"}),
-        )
-    return {"statusCode": 200, "body": json.dumps({"message": "classification completed"})}
+    except content_table.meta.client.exceptions.ConditionalCheckFailedException:
+        pass  # Extraction did not record this content (heuristic result)
 
 
 def classify_with_ai(metadata: Dict[str, Any]) -> Dict[str, str] | None:
@@ -72,8 +227,61 @@ def classify_with_ai(metadata: Dict[str, Any]) -> Dict[str, str] | None:
         + ", ".join(ALLOWED_CATEGORIES)
         + "\nReturn JSON with keys: category (from list above) and subcategory (more specific, e.g. 'cover_letter').\n"
         "Here is the metadata:\n"
-        + json.dumps(metadata, ensure_ascii=False)
+        + json.dumps(_prompt_view(metadata), ensure_ascii=False, default=str)
     )
+    try:
+        ai_result = _chat_json(prompt)
+        category = ai_result.get("category", "letter").lower()
+        if category not in ALLOWED_CATEGORIES:
+            category = "letter"
+        sub = ai_result.get("subcategory", category)
+        return {"category": category, "subcategory": sub}
+    except Exception as exc:
+        logger.warning("AI classification failed: %s", exc)
+        return None
+
+
+def classify_batch_with_ai(documents: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Classify several documents with one request; returns labels by documentId
+
+    Documents absent from the result (request failed, entry malformed or
+    category outside ALLOWED_CATEGORIES) are left for the caller's fallback.
+    """
+    if not OPENAI_API_KEY or not documents:
+        return {}
+    prompt = (
+        "You must classify documents strictly into one of these categories:\n"
+        + ", ".join(ALLOWED_CATEGORIES)
+        + "\nReturn JSON with key results: an array with one object per document, each with keys "
+        "documentId, category (from list above) and subcategory (more specific, e.g. 'cover_letter').\n"
+        "Here are the documents:\n"
+        + json.dumps(
+            [{"documentId": doc_id, **_prompt_view(metadata)} for doc_id, metadata in documents.items()],
+            ensure_ascii=False,
+            default=str,
+        )
+    )
+    try:
+        results = _chat_json(prompt).get("results")
+    except Exception as exc:
+        logger.warning("Batched AI classification of %d documents failed: %s", len(documents), exc)
+        return {}
+    labels: Dict[str, Dict[str, str]] = {}
+    for entry in results if isinstance(results, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        doc_id = entry.get("documentId")
+        category = str(entry.get("category", "")).lower()
+        if doc_id in documents and category in ALLOWED_CATEGORIES:
+            labels[doc_id] = {"category": category, "subcategory": entry.get("subcategory") or category}
+    return labels
+
+
+def _prompt_view(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: metadata[k] for k in PROMPT_FIELDS if metadata.get(k)}
+
+
+def _chat_json(prompt: str) -> Dict[str, Any]:
     payload = {
         "model": OPENAI_MODEL,
         "messages": [
@@ -83,26 +291,13 @@ def classify_with_ai(metadata: Dict[str, Any]) -> Dict[str, str] | None:
         "temperature": 0.1,
         "response_format": {"type": "json_object"},
     }
-    try:
-        req = urllib.request.Request(
-            "https://api.openai.com/v1/chat/completions",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-            },
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            content = data["choices"][0]["message"]["content"]
-            ai_result = json.loads(content)
-            category = ai_result.get("category", "letter").lower()
-            if category not in ALLOWED_CATEGORIES:
-                category = "letter"
-            sub = ai_result.get("subcategory", category)
-            return {"category": category, "subcategory": sub}
-    except Exception:
-        return None
+    content = llm_cache.get(payload)
+    if content is None:
+        content = llm.chat(payload)
+        ai_result = json.loads(content)
+        llm_cache.put(payload, content)
+        return ai_result
+    return json.loads(content)
 
 
 def fallback_classification(metadata: Dict[str, Any]) -> Dict[str, str]:
@@ -0,0 +1,236 @@
+"""Shared keep-alive client for OpenAI-compatible chat completion APIs"""
+from __future__ import annotations
+
+import http.client
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+METRICS_NAMESPACE = "DocumentPipeline/LLM"
+# Time left for the rest of the invocation once LLM calls give up
+DEADLINE_RESERVE_SECONDS = float(os.environ.get("LLM_DEADLINE_RESERVE_SECONDS", "10"))
+# An attempt with less time than this left is not started
+MIN_ATTEMPT_SECONDS = 1.0
+
+
+class LlmError(Exception):
+    """The completion could not be obtained, after retries where they apply"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class LlmClient:
+    """Chat completions over a pool of persistent HTTP(S) connections
+
+    Connections stay open between calls, and between invocations of a warm
+    Lambda, so only the first request pays for the TCP and TLS handshakes.
+    Throttling (429), server errors and dropped connections are retried with
+    exponential backoff and jitter; a ``Retry-After`` header takes precedence.
+    Attempts, socket timeouts and backoff sleeps all stop at the deadline set by
+    ``set_deadline``, so retries never outlive the Lambda invocation. Every call
+    logs latency and token usage as a CloudWatch embedded metric.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str = OPENAI_BASE_URL,
+        timeout: float = 30.0,
+        max_attempts: int = 4,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 20.0,
+        pool_size: int = 8,
+    ):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.api_key = api_key
+        self._scheme = parsed.scheme
+        self._host = parsed.netloc
+        self._path = parsed.path.rstrip("/")
+        self._timeout = timeout
+        self._max_attempts = max_attempts
+        self._backoff_seconds = backoff_seconds
+        self._max_backoff_seconds = max_backoff_seconds
+        self._pool_size = pool_size
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._deadline: Optional[float] = None
+
+    def set_deadline(self, context: Any, reserve_seconds: float = DEADLINE_RESERVE_SECONDS) -> None:
+        """Give up on calls ``reserve_seconds`` before this invocation times out
+
+        Call at the start of each invocation with the Lambda context; without
+        ``get_remaining_time_in_millis`` (local runs) calls are not limited.
+        """
+        remaining = getattr(context, "get_remaining_time_in_millis", None)
+        self._deadline = (
+            time.monotonic() + remaining() / 1000.0 - reserve_seconds if remaining else None
+        )
+
+    def chat(self, payload: Dict[str, Any]) -> str:
+        """POST /chat/completions and return the first choice's message content"""
+        if not self.api_key:
+            raise LlmError("No API key configured")
+        body = json.dumps(payload).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+        started = time.perf_counter()
+        deadline = self._deadline
+        for attempt in range(1, self._max_attempts + 1):
+            timeout = self._attempt_timeout(deadline)
+            try:
+                status, response_headers, data = self._post(
+                    "/chat/completions", body, headers, timeout
+                )
+            except (OSError, http.client.HTTPException) as exc:
+                if attempt == self._max_attempts:
+                    raise LlmError(f"Connection failed: {exc}") from exc
+                self._sleep(attempt, None, deadline)
+                continue
+            if status == 200:
+                result = json.loads(data.decode("utf-8"))
+                self._record(payload.get("model", ""), started, attempt, result.get("usage", {}))
+                return result["choices"][0]["message"]["content"]
+            if status not in RETRYABLE_STATUS or attempt == self._max_attempts:
+                raise LlmError(f"Chat completion failed with HTTP {status}", status)
+            logger.warning("Chat completion returned HTTP %s (attempt %s)", status, attempt)
+            self._sleep(attempt, response_headers.get("retry-after"), deadline, status)
+        raise LlmError("Chat completion failed")  # pragma: no cover - loop always returns or raises
+
+    def _attempt_timeout(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return self._timeout
+        remaining = deadline - time.monotonic()
+        if remaining < MIN_ATTEMPT_SECONDS:
+            raise LlmError("Invocation deadline reached before the call completed")
+        return min(self._timeout, remaining)
+
+    def _post(self, path: str, body: bytes, headers: Dict[str, str], timeout: float):
+        conn, reused = self._acquire()
+        try:
+            result = self._exchange(conn, path, body, headers, timeout)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle pooled connection; one fresh attempt is free
+            conn = self._connect()
+            try:
+                result = self._exchange(conn, path, body, headers, timeout)
+            except Exception:
+                conn.close()
+                raise
+        status, response_headers, data, will_close = result
+        if will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return status, response_headers, data
+
+    def _exchange(
+        self,
+        conn: http.client.HTTPConnection,
+        path: str,
+        body: bytes,
+        headers: Dict[str, str],
+        timeout: float,
+    ):
+        # Pooled connections keep their socket; shorten it to this attempt's budget
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        conn.request("POST", self._path + path, body=body, headers=headers)
+        resp = conn.getresponse()
+        data = resp.read()  # Drain fully so the connection can be reused
+        response_headers = {k.lower(): v for k, v in resp.getheaders()}
+        return resp.status, response_headers, data, resp.will_close
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._host, timeout=self._timeout)
+        return http.client.HTTPConnection(self._host, timeout=self._timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self._pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _sleep(
+        self,
+        attempt: int,
+        retry_after: Optional[str],
+        deadline: Optional[float],
+        status: Optional[int] = None,
+    ) -> None:
+        delay = _retry_after_seconds(retry_after)
+        if delay is None:
+            delay = self._backoff_seconds * 2 ** (attempt - 1) * (0.5 + random.random())
+        delay = min(delay, self._max_backoff_seconds)
+        if deadline is not None and time.monotonic() + delay + MIN_ATTEMPT_SECONDS > deadline:
+            # Waiting would leave no time for the retry itself
+            raise LlmError("Invocation deadline leaves no time to retry", status)
+        time.sleep(delay)
+
+    def _record(self, model: str, started: float, attempts: int, usage: Dict[str, Any]) -> None:
+        # Embedded metric format must be a bare JSON line; logging would prefix it
+        print(
+            json.dumps(
+                {
+                    "_aws": {
+                        "Timestamp": int(time.time() * 1000),
+                        "CloudWatchMetrics": [
+                            {
+                                "Namespace": METRICS_NAMESPACE,
+                                "Dimensions": [["model"]],
+                                "Metrics": [
+                                    {"Name": "LatencyMs", "Unit": "Milliseconds"},
+                                    {"Name": "Attempts", "Unit": "Count"},
+                                    {"Name": "PromptTokens", "Unit": "Count"},
+                                    {"Name": "CompletionTokens", "Unit": "Count"},
+                                ],
+                            }
+                        ],
+                    },
+                    "model": model,
+                    "LatencyMs": round((time.perf_counter() - started) * 1000, 1),
+                    "Attempts": attempts,
+                    "PromptTokens": usage.get("prompt_tokens", 0),
+                    "CompletionTokens": usage.get("completion_tokens", 0),
+                }
+            )
+        )
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
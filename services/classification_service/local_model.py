@@ -0,0 +1,247 @@
+"""Compact multinomial naive Bayes over hashed tokens, used before the LLM
+
+Model file layout: ``MAGIC``, a 4-byte little-endian header length, a JSON
+header (categories, bucket count, default subcategories) and then the
+log-prior and log-likelihood rows as little-endian float32 arrays. Loading is
+a single read into ``array('f')``; there is no dependency beyond the stdlib.
+
+Train from historical labels with::
+
+    python local_model.py DocumentsTable model/classifier.bin
+
+One document in five (by ``documentId`` hash) is held out of training and used
+to pick the confidence threshold stored in the header: the lowest confidence at
+which held-out predictions still reach ``--target-precision``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from search_index import document_term_stats
+
+MAGIC = b"NBC1"
+DEFAULT_BUCKETS = 1 << 14
+# Inputs the model sees; the label itself must never leak into the features
+FEATURE_FIELDS = ("title", "summary", "keywords", "documentType", "filename")
+# Labels assigned without the LLM are not trusted as training data
+UNTRUSTED_SOURCES = ("local", "fallback")
+# Used by model files written before thresholds were calibrated
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_TARGET_PRECISION = 0.97
+HOLDOUT_PERCENT = 20
+
+
+def is_trusted(item: Dict[str, Any], include_unsourced: bool = False) -> bool:
+    """Whether an item's label may be trained on
+
+    Items without ``classificationSource`` predate that attribute and may have
+    been labelled by the title heuristics, so they are skipped unless asked for.
+    """
+    if not item.get("category"):
+        return False
+    source = item.get("classificationSource")
+    if source is None:
+        return include_unsourced
+    return source not in UNTRUSTED_SOURCES
+
+
+def is_held_out(item: Dict[str, Any]) -> bool:
+    """Stable holdout membership, so retraining on a grown table keeps the split"""
+    return zlib.crc32(str(item.get("documentId", "")).encode("utf-8")) % 100 < HOLDOUT_PERCENT
+
+
+def features(metadata: Dict[str, Any], buckets: int) -> Dict[int, int]:
+    """Field-weighted token counts hashed into ``buckets`` slots"""
+    hashed: Dict[int, int] = defaultdict(int)
+    terms = document_term_stats({field: metadata.get(field) for field in FEATURE_FIELDS})
+    for token, count in terms.items():
+        hashed[zlib.crc32(token.encode("utf-8")) % buckets] += count
+    return hashed
+
+
+class LocalClassifier:
+    def __init__(
+        self,
+        categories: List[str],
+        subcategories: Dict[str, str],
+        log_priors: array,
+        log_likelihoods: array,
+        buckets: int,
+        threshold: float = DEFAULT_THRESHOLD,
+    ):
+        self.categories = categories
+        self.subcategories = subcategories
+        self.buckets = buckets
+        self.threshold = threshold
+        self._log_priors = log_priors
+        self._log_likelihoods = log_likelihoods
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        with open(path, "rb") as handle:
+            data = handle.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a classifier model")
+        (header_length,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8:8 + header_length].decode("utf-8"))
+        weights = array("f")
+        weights.frombytes(data[8 + header_length:])
+        if sys.byteorder != "little":
+            weights.byteswap()
+        count = len(header["categories"])
+        return cls(
+            header["categories"],
+            header.get("subcategories", {}),
+            weights[:count],
+            weights[count:],
+            header["buckets"],
+            header.get("threshold", DEFAULT_THRESHOLD),
+        )
+
+    def save(self, path: str) -> None:
+        header = json.dumps(
+            {
+                "categories": self.categories,
+                "subcategories": self.subcategories,
+                "buckets": self.buckets,
+                "threshold": self.threshold,
+            }
+        ).encode("utf-8")
+        weights = self._log_priors + self._log_likelihoods
+        if sys.byteorder != "little":
+            weights.byteswap()
+        with open(path, "wb") as handle:
+            handle.write(MAGIC + struct.pack("<I", len(header)) + header)
+            handle.write(weights.tobytes())
+
+    def predict(self, metadata: Dict[str, Any]) -> Tuple[str, float]:
+        """Return the most likely category and its posterior probability"""
+        hashed = features(metadata, self.buckets)
+        scores = []
+        for row, category in enumerate(self.categories):
+            offset = row * self.buckets
+            score = self._log_priors[row]
+            for bucket, count in hashed.items():
+                score += count * self._log_likelihoods[offset + bucket]
+            scores.append(score)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        total = sum(math.exp(score - scores[best]) for score in scores)
+        return self.categories[best], 1.0 / total
+
+
+def train(
+    items: Iterable[Dict[str, Any]],
+    buckets: int = DEFAULT_BUCKETS,
+    alpha: float = 0.1,
+    include_unsourced: bool = False,
+) -> LocalClassifier:
+    """Fit category priors and smoothed per-bucket likelihoods from trusted labelled items"""
+    doc_counts: Counter = Counter()
+    token_counts: Dict[str, List[int]] = {}
+    sub_counts: Dict[str, Counter] = defaultdict(Counter)
+    for item in items:
+        if not is_trusted(item, include_unsourced):
+            continue
+        category = item["category"]
+        doc_counts[category] += 1
+        if item.get("subcategory"):
+            sub_counts[category][item["subcategory"]] += 1
+        row = token_counts.setdefault(category, [0] * buckets)
+        for bucket, count in features(item, buckets).items():
+            row[bucket] += count
+    if not doc_counts:
+        raise ValueError("No labelled documents to train on")
+
+    categories = sorted(doc_counts)
+    total_docs = sum(doc_counts.values())
+    log_priors = array("f", (math.log(doc_counts[c] / total_docs) for c in categories))
+    log_likelihoods = array("f")
+    for category in categories:
+        row = token_counts[category]
+        denominator = sum(row) + alpha * buckets
+        log_likelihoods.extend(math.log((count + alpha) / denominator) for count in row)
+    subcategories = {
+        category: counts.most_common(1)[0][0] for category, counts in sub_counts.items()
+    }
+    return LocalClassifier(categories, subcategories, log_priors, log_likelihoods, buckets)
+
+
+def calibrate_threshold(
+    model: LocalClassifier,
+    items: Iterable[Dict[str, Any]],
+    target_precision: float = DEFAULT_TARGET_PRECISION,
+) -> float:
+    """Lowest confidence at which predictions on ``items`` reach ``target_precision``
+
+    Every prediction at or above the returned threshold counts, so ties are
+    accepted or rejected together.
+    """
+    scored = []
+    for item in items:
+        category, confidence = model.predict(item)
+        scored.append((confidence, category == item["category"]))
+    if not scored:
+        raise ValueError("No held-out documents to calibrate on")
+    scored.sort(reverse=True)
+    threshold: Optional[float] = None
+    correct = 0
+    for index, (confidence, hit) in enumerate(scored):
+        correct += hit
+        if index + 1 < len(scored) and scored[index + 1][0] == confidence:
+            continue
+        if correct / (index + 1) >= target_precision:
+            threshold = confidence
+    if threshold is None:
+        raise ValueError(f"Held-out precision never reaches {target_precision}")
+    return threshold
+
+
+def _scan(table_name: str) -> Iterable[Dict[str, Any]]:
+    import boto3
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    kwargs: Dict[str, Any] = {}
+    while True:
+        resp = table.scan(**kwargs)
+        yield from resp.get("Items", [])
+        if "LastEvaluatedKey" not in resp:
+            return
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the local classifier from DocumentsTable labels")
+    parser.add_argument("documents_table")
+    parser.add_argument("output_file")
+    parser.add_argument(
+        "--include-unsourced",
+        action="store_true",
+        help="also train on labels without classificationSource (written before it existed)",
+    )
+    parser.add_argument("--target-precision", type=float, default=DEFAULT_TARGET_PRECISION)
+    args = parser.parse_args()
+
+    labelled = [item for item in _scan(args.documents_table) if is_trusted(item, args.include_unsourced)]
+    held_out = [item for item in labelled if is_held_out(item)]
+    model = train((item for item in labelled if not is_held_out(item)), include_unsourced=args.include_unsourced)
+    try:
+        model.threshold = calibrate_threshold(model, held_out, args.target_precision)
+    except ValueError as err:
+        sys.exit(str(err))
+    model.save(args.output_file)
+    print(
+        f"Trained on {len(labelled) - len(held_out)} documents in {len(model.categories)} categories, "
+        f"threshold {model.threshold:.4f} from {len(held_out)} held out -> {args.output_file}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Token-budgeted splitting of extracted text for map-reduce summarisation"""
+from __future__ import annotations
+
+import re
+from typing import List
+
+# Rough average for English prose with OpenAI tokenizers; avoids a tokenizer dependency
+CHARS_PER_TOKEN = 4
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def chunk_text(text: str, max_tokens: int, max_chunks: int | None = None) -> List[str]:
+    """Pack paragraphs (then sentences, then raw slices) into chunks of at most max_tokens
+
+    When more than ``max_chunks`` chunks result, an evenly spaced selection is
+    returned so the whole document is still represented at bounded cost.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for piece in _pieces(text, max_chars):
+        if current and size + len(piece) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+
+    if max_chunks and len(chunks) > max_chunks:
+        step = len(chunks) / max_chunks
+        chunks = [chunks[int(i * step)] for i in range(max_chunks)]
+    return chunks
+
+
+def _pieces(text: str, max_chars: int) -> List[str]:
+    pieces: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            for start in range(0, len(sentence), max_chars):
+                pieces.append(sentence[start:start + max_chars])
+    return pieces
@@ -1,68 +1,321 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 import io
 import json
+import logging
 import os
 import sys
+import tempfile
+import threading
 import zipfile
-import urllib.request
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple, Union
 
 import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 
 sys.path.append(str(Path(__file__).resolve().parent / "lib"))
 from PyPDF2 import PdfReader  # type: ignore
+from PyPDF2._utils import open_mapped, stream_buffer  # type: ignore
+
+from categories import ALLOWED_CATEGORIES
+from chunking import chunk_text, estimate_tokens
+from llm_cache import LlmCache
+from llm_client import LlmClient
+from pdf_pages import page_at, page_count
+from s3_range_file import open_s3_object
+from sqs_batch import process_batch
+from sqs_producer import BufferedSqsProducer
+
+logger = logging.getLogger(__name__)
 
 s3 = boto3.client("s3")
 sqs = boto3.client("sqs")
+# Low-level clients are thread-safe, so one serves every worker and invocation
+dynamodb = boto3.client("dynamodb")
+producer = BufferedSqsProducer(sqs)
+llm_cache = LlmCache()
 
 BUCKET = os.environ.get("DOCUMENTS_BUCKET", "demo-docs")
 METADATA_QUEUE = os.environ.get("METADATA_QUEUE_URL", "demo-metadata-queue")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+llm = LlmClient(OPENAI_API_KEY)
+CONTENT_HASH_TABLE = os.environ.get("CONTENT_HASH_TABLE", "ContentHashTable")
+DOCUMENTS_TABLE = os.environ.get("DOCUMENTS_TABLE", "DocumentsTable")
+# Let the extraction prompt also assign category/subcategory so classification
+# can skip its own LLM round trip
+COMBINED_CLASSIFICATION = os.environ.get("COMBINED_CLASSIFICATION", "false").lower() == "true"
+# "fast" sends only the opening FAST_TEXT_CHARS and stops parsing pages once they
+# are collected; "full" summarises token-budgeted chunks in parallel, then reduces
+SUMMARY_MODE = os.environ.get("SUMMARY_MODE", "fast").lower()
+FAST_TEXT_CHARS = int(os.environ.get("FAST_TEXT_CHARS", "6000"))
+CHUNK_TOKENS = int(os.environ.get("CHUNK_TOKENS", "1500"))
+MAX_CHUNKS = int(os.environ.get("MAX_CHUNKS", "12"))
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "4"))
+# PDF pages read: "sequential" from the start (capped by MAX_PAGES, 0 = no cap) or
+# "sample" = the first, middle and last pages in the counts given by SAMPLE_PAGES
+PAGE_STRATEGY = os.environ.get("PAGE_STRATEGY", "sequential").lower()
+MAX_PAGES = int(os.environ.get("MAX_PAGES", "0"))
+SAMPLE_PAGES = tuple(int(n) for n in os.environ.get("SAMPLE_PAGES", "3,2,2").split(","))
+# Plain text beyond this never reaches a prompt, so it is not read
+TEXT_READ_LIMIT = 8 * 1024 * 1024
+
+# Records of a batch run concurrently so S3 reads and LLM calls overlap; PDF
+# parsing is CPU-bound and holds the GIL, so it gets its own, smaller bound.
+EXTRACTION_CONCURRENCY = int(os.environ.get("EXTRACTION_CONCURRENCY", "4"))
+PARSE_CONCURRENCY = int(os.environ.get("PARSE_CONCURRENCY", "1"))
+_parse_slots = threading.BoundedSemaphore(max(PARSE_CONCURRENCY, 1))
+# Objects at least this large are parsed through ranged GETs instead of being
+# downloaded into memory. Every worker may hold one downloaded object at once,
+# so the default keeps them all within a quarter of the function's memory.
+MEMORY_MB = int(os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "1024"))
+RANGE_READ_THRESHOLD = int(
+    os.environ.get(
+        "RANGE_READ_THRESHOLD",
+        str(min(32 * 1024 * 1024, MEMORY_MB * 1024 * 1024 // (4 * max(EXTRACTION_CONCURRENCY, 1)))),
+    )
+)
+# How such objects are read: "range" (ranged GETs) or "spill" (download to
+# SPILL_DIR and memory-map, trading ephemeral storage for a real SHA-256)
+LARGE_OBJECT_MODE = os.environ.get("LARGE_OBJECT_MODE", "range").lower()
+SPILL_DIR = os.environ.get("SPILL_DIR", tempfile.gettempdir())
 
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+# Fields reused verbatim when identical content was already extracted
+REUSABLE_FIELDS = ("summary", "documentType", "keywords", "category", "subcategory")
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    # LLM retries give up before the invocation times out, leaving time to fall back
+    llm.set_deadline(context)
+    return process_batch(
+        event, process_record, max_workers=EXTRACTION_CONCURRENCY, producer=producer
+    )
 
-def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
-    processed = 0
-    for record in event.get("Records", []):
-        body = json.loads(record["body"])
+
+def process_record(record: Dict[str, Any]) -> None:
+    body = json.loads(record["body"])
+    for job in _extraction_jobs(body):
+        with _open_content(job) as (content, content_hash):
+            content_key = _content_key(job, content_hash)
+            metadata = None
+            if content_key:
+                metadata = _reuse_extraction(content_key, job["filename"], job["documentId"])
+            if metadata is None:
+                with _parse_slots:
+                    text_snippet = extract_text(
+                        content,
+                        job["filename"],
+                        char_budget=FAST_TEXT_CHARS if SUMMARY_MODE == "fast" else None,
+                        page_budget=MAX_PAGES or None,
+                        strategy=PAGE_STRATEGY,
+                    )
+        # The LLM call runs after the content, and any spill file, is released
+        if metadata is None:
+            metadata = _extract_metadata_with_ai(text_snippet, job["filename"], job["documentId"])
+            if content_key and metadata.get("extractionModel"):
+                # Only AI results are worth reusing; heuristic fallbacks are retried
+                _remember_extraction(content_key, metadata)
+        metadata["contentHash"] = content_hash
+        metadata["filename"] = job["filename"]
+        producer.send(METADATA_QUEUE, metadata, source=record.get("messageId"))
+
+
+@contextmanager
+def _open_content(job: Dict[str, str]) -> Iterator[Tuple[Union[bytes, BinaryIO], str]]:
+    """Yield the object's content (bytes or a seekable file) and its content hash"""
+    obj = s3.get_object(Bucket=job["bucket"], Key=job["key"])
+    size = obj["ContentLength"]
+    if size < RANGE_READ_THRESHOLD:
+        content = obj["Body"].read()
+        yield content, hashlib.sha256(content).hexdigest()
+        return
+    obj["Body"].close()
+    if LARGE_OBJECT_MODE == "spill":
+        with tempfile.NamedTemporaryFile(dir=SPILL_DIR) as spill:
+            s3.download_fileobj(job["bucket"], job["key"], spill)
+            spill.flush()
+            mapped = open_mapped(spill.name)
+            try:
+                yield mapped, hashlib.sha256(stream_buffer(mapped)).hexdigest()
+            finally:
+                mapped.close()
+        return
+    # Hashing would mean reading every byte; the ETag identifies the content
+    # as well for uploads made with the same part size
+    etag = obj["ETag"].strip('"')
+    yield open_s3_object(s3, job["bucket"], job["key"], size), f"etag:{etag}:{size}"
+
+
+def _extraction_jobs(body: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Normalise an S3 ObjectCreated notification (or a legacy upload message) into jobs"""
+    if "key" in body and "documentId" in body:
         key = body["key"]
-        doc_id = body["documentId"]
-        filename = body.get("filename", key.split("/")[-1])
+        return [
+            {
+                "bucket": body.get("bucket", BUCKET),
+                "key": key,
+                "documentId": body["documentId"],
+                "filename": body.get("filename", key.split("/")[-1]),
+                **({"userId": body["userId"]} if body.get("userId") else {}),
+            }
+        ]
+    jobs = []
+    # s3:TestEvent and other non-record notifications carry no Records
+    for s3_record in body.get("Records", []):
+        if not s3_record.get("eventName", "").startswith("ObjectCreated"):
+            continue
+        key = urllib.parse.unquote_plus(s3_record["s3"]["object"]["key"])
+        parts = key.split("/", 2)
+        if len(parts) != 3 or parts[0] != "uploads":
+            continue
+        jobs.append(
+            {
+                "bucket": s3_record["s3"]["bucket"]["name"],
+                "key": key,
+                "documentId": parts[1],
+                "filename": parts[2],
+            }
+        )
+    return jobs
+
+
+def _content_key(job: Dict[str, str], content_hash: str) -> str | None:
+    """ContentHashTable key: "<userId>#<hash>", so reuse never crosses tenants
+
+    S3 events carry no owner, so it is read from the document row; without one
+    the content is neither reused nor remembered.
+    """
+    user_id = job.get("userId")
+    if not user_id:
+        item = dynamodb.get_item(
+            TableName=DOCUMENTS_TABLE,
+            Key={"documentId": {"S": job["documentId"]}},
+            ProjectionExpression="userId",
+        ).get("Item") or {}
+        user_id = item.get("userId", {}).get("S")
+    return f"{user_id}#{content_hash}" if user_id else None
 
-        obj = s3.get_object(Bucket=BUCKET, Key=key)
-        content_bytes = obj["Body"].read()
-        text_snippet = extract_text(content_bytes, filename)
 
-        metadata = _extract_metadata_with_ai(text_snippet, filename, doc_id)
-        sqs.send_message(QueueUrl=METADATA_QUEUE, MessageBody=json.dumps(metadata))
-        processed += 1
+def _reuse_extraction(content_key: str, filename: str, doc_id: str) -> Dict[str, Any] | None:
+    """Build metadata from the same user's earlier extraction of identical content"""
+    item = dynamodb.get_item(
+        TableName=CONTENT_HASH_TABLE, Key={"contentHash": {"S": content_key}}
+    ).get("Item")
+    if not item:
+        return None
+    cached = {name: _deserializer.deserialize(value) for name, value in item.items()}
+    metadata = {
+        "documentId": doc_id,
+        "title": filename.rsplit(".", 1)[0],
+        "extractionStatus": "completed",
+        "extractionModel": cached.get("extractionModel"),
+        "deduplicatedFrom": cached.get("documentId"),
+    }
+    metadata.update({field: cached[field] for field in REUSABLE_FIELDS if field in cached})
+    return metadata
+
 
-    return {"statusCode": 200, "body": json.dumps({"processed": processed})}
+def _remember_extraction(content_key: str, metadata: Dict[str, Any]) -> None:
+    item = {field: metadata[field] for field in REUSABLE_FIELDS if field in metadata}
+    item.update(
+        {
+            "contentHash": content_key,
+            "documentId": metadata["documentId"],
+            "extractionModel": metadata["extractionModel"],
+            "createdAt": datetime.utcnow().isoformat(),
+        }
+    )
+    try:
+        dynamodb.put_item(
+            TableName=CONTENT_HASH_TABLE,
+            Item={name: _serializer.serialize(value) for name, value in item.items()},
+            ConditionExpression="attribute_not_exists(contentHash)",
+        )
+    except dynamodb.exceptions.ConditionalCheckFailedException:
+        pass  # A concurrent upload of the same content got there first
 
 
-def extract_text(data: bytes, filename: str) -> str:
+def extract_text(
+    data: Union[bytes, BinaryIO],
+    filename: str,
+    char_budget: int | None = None,
+    page_budget: int | None = None,
+    strategy: str = "sequential",
+) -> str:
     ext = filename.lower().rsplit('.', 1)[-1] if '.' in filename else ''
     try:
         if ext == 'pdf':
-            reader = PdfReader(io.BytesIO(data))
-            text = "\n".join(page.extract_text() or '' for page in reader.pages)
+            reader = PdfReader(_as_stream(data))
+            text = "\n".join(iter_pdf_text(reader, char_budget, page_budget, strategy))
             if text.strip():
                 return text
         elif ext in ('docx', 'doc'):
             return extract_docx_text(data)
         elif ext in ('txt', 'csv'):
-            return data.decode('utf-8', errors='ignore')
+            return _read_prefix(data, TEXT_READ_LIMIT).decode('utf-8', errors='ignore')
     except Exception:
         pass
-    return _bytes_to_text(data)
+    return _bytes_to_text(_read_prefix(data, 6000))
+
+
+def iter_pdf_text(
+    reader: Any,
+    char_budget: int | None = None,
+    page_budget: int | None = None,
+    strategy: str = "sequential",
+) -> Iterator[str]:
+    """Yield page texts lazily, stopping once the character budget is met
+
+    In "sample" mode each selected page gets an equal share of the budget, so
+    the middle and last pages still reach the prompt; a ``[...]`` marker is
+    yielded where pages were skipped.
+    """
+    page_numbers = select_pages(page_count(reader), strategy, page_budget)
+    per_page = None
+    if char_budget and strategy == "sample" and page_numbers:
+        per_page = char_budget // len(page_numbers)
+    collected = 0
+    previous = -1
+    for number in page_numbers:
+        if previous >= 0 and number != previous + 1:
+            yield "[...]"
+        previous = number
+        page_text = page_at(reader, number).extract_text() or ''
+        if per_page:
+            page_text = page_text[:per_page]
+        yield page_text
+        collected += len(page_text) + 1
+        if char_budget and not per_page and collected >= char_budget:
+            return  # Later pages would never reach the prompt
 
 
-def extract_docx_text(data: bytes) -> str:
+def select_pages(
+    page_count: int, strategy: str = "sequential", page_budget: int | None = None
+) -> List[int]:
+    """Page indexes to read; ``page_budget`` caps sequential reads only"""
+    if strategy == "sample":
+        head, middle, tail = SAMPLE_PAGES
+        middle_start = max(page_count // 2 - middle // 2, 0)
+        chosen = set(range(min(head, page_count)))
+        chosen.update(range(middle_start, min(middle_start + middle, page_count)))
+        chosen.update(range(max(page_count - tail, 0), page_count))
+        return sorted(chosen)
+    return list(range(min(page_count, page_budget) if page_budget else page_count))
+
+
+def extract_docx_text(data: Union[bytes, BinaryIO]) -> str:
     try:
-        with zipfile.ZipFile(io.BytesIO(data)) as doc:
+        with zipfile.ZipFile(_as_stream(data)) as doc:
             xml_content = doc.read('word/document.xml')
         from xml.etree.ElementTree import XML
         tree = XML(xml_content)
@@ -72,7 +325,18 @@ def extract_docx_text(data: bytes) -> str:
                 paragraphs.append(node.text)
         return '\n'.join(paragraphs)
     except Exception:
-        return _bytes_to_text(data)
+        return _bytes_to_text(_read_prefix(data, 6000))
+
+
+def _as_stream(data: Union[bytes, BinaryIO]) -> BinaryIO:
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+
+
+def _read_prefix(data: Union[bytes, BinaryIO], limit: int) -> bytes:
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data[:limit])
+    data.seek(0)
+    return data.read(limit)
 
 
 def _bytes_to_text(data: bytes, limit: int = 6000) -> str:
@@ -86,11 +350,89 @@ def _extract_metadata_with_ai(text: str, filename: str, doc_id: str) -> Dict[str
     if not OPENAI_API_KEY:
         return _mock_metadata(text, filename, doc_id)
 
+    try:
+        if SUMMARY_MODE == "full" and estimate_tokens(text) > CHUNK_TOKENS:
+            ai_metadata = _summarise_in_chunks(text)
+        else:
+            ai_metadata = _chat_json(
+                _metadata_prompt(
+                    "plain text extracted from a user document", "TEXT", text[:FAST_TEXT_CHARS]
+                )
+            )
+        metadata = {
+            "documentId": doc_id,
+            "title": filename.rsplit(".", 1)[0],
+            "summary": ai_metadata.get("summary", text[:200]),
+            "documentType": ai_metadata.get("documentType", ext_from_filename(filename)),
+            "keywords": ai_metadata.get("keywords", []),
+            "extractionStatus": "completed",
+            "extractionModel": OPENAI_MODEL,
+        }
+        category = str(ai_metadata.get("category", "")).lower()
+        if COMBINED_CLASSIFICATION and category in ALLOWED_CATEGORIES:
+            # Anything outside the list is left for classification_service to decide
+            metadata["category"] = category
+            metadata["subcategory"] = ai_metadata.get("subcategory") or category
+        return metadata
+    except Exception as exc:
+        logger.warning("AI extraction failed for %s, using heuristics: %s", doc_id, exc)
+        return _mock_metadata(text, filename, doc_id)
+
+
+def _metadata_prompt(source: str, label: str, body: str) -> str:
     prompt = (
-        "You receive plain text extracted from a user document. "
+        f"You receive {source}. "
         "Return JSON with keys: title (string), summary (string), documentType (string), keywords (array of strings)."\
-        "Focus on the real content and keep summary under 120 words.\n\nTEXT:\n" + text[:6000]
+        "Focus on the real content and keep summary under 120 words.\n"
     )
+    if COMBINED_CLASSIFICATION:
+        prompt += (
+            "Also classify the document strictly into one of these categories: "
+            + ", ".join(ALLOWED_CATEGORIES)
+            + ". Add keys category (from that list) and subcategory (more specific, e.g. 'cover_letter').\n"
+        )
+    return prompt + f"\n{label}:\n" + body
+
+
+def _summarise_in_chunks(text: str) -> Dict[str, Any]:
+    """Map: summarise token-budgeted chunks in parallel; reduce: derive document metadata"""
+    chunks = chunk_text(text, CHUNK_TOKENS, MAX_CHUNKS)
+    with ThreadPoolExecutor(max_workers=max(min(SUMMARY_CONCURRENCY, len(chunks)), 1)) as pool:
+        partials = list(
+            pool.map(lambda args: _summarise_chunk(*args, len(chunks)), enumerate(chunks, 1))
+        )
+    sections = [
+        f"[{index}/{len(chunks)}] {partial.get('summary', '')}"
+        f" (keywords: {', '.join(str(k) for k in partial.get('keywords', []))})"
+        for index, partial in enumerate(partials, 1)
+        if partial
+    ]
+    if not sections:
+        raise ValueError("No section could be summarised")
+    return _chat_json(
+        _metadata_prompt(
+            "summaries of consecutive sections of a user document",
+            "SECTION SUMMARIES",
+            "\n".join(sections),
+        )
+    )
+
+
+def _summarise_chunk(index: int, chunk: str, count: int) -> Dict[str, Any] | None:
+    prompt = (
+        f"This is section {index} of {count} of a longer document. "
+        "Return JSON with keys: summary (string, at most 80 words), keywords (array of strings)."
+        "\n\nSECTION:\n" + chunk
+    )
+    try:
+        return _chat_json(prompt)
+    except Exception as exc:
+        # The reduce step works with whatever sections did succeed
+        logger.warning("Summarising section %s/%s failed: %s", index, count, exc)
+        return None
+
+
+def _chat_json(prompt: str) -> Dict[str, Any]:
     payload = {
         "model": OPENAI_MODEL,
         "messages": [
@@ -100,30 +442,13 @@ def _extract_metadata_with_ai(text: str, filename: str, doc_id: str) -> Dict[str
         "temperature": 0.2,
         "response_format": {"type": "json_object"},
     }
-
-    try:
-        req = urllib.request.Request(
-            "https://api.openai.com/v1/chat/completions",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-            },
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            content = data["choices"][0]["message"]["content"]
-            ai_metadata = json.loads(content)
-            return {
-                "documentId": doc_id,
-                "title": filename.rsplit(".", 1)[0],
-                "summary": ai_metadata.get("summary", text[:200]),
-                "documentType": ai_metadata.get("documentType", ext_from_filename(filename)),
-                "keywords": ai_metadata.get("keywords", []),
-                "extractionStatus": "completed",
-            }
-    except Exception:
-        return _mock_metadata(text, filename, doc_id)
+    content = llm_cache.get(payload)
+    if content is None:
+        content = llm.chat(payload)
+        result = json.loads(content)
+        llm_cache.put(payload, content)
+        return result
+    return json.loads(content)
 
 
 def ext_from_filename(filename: str) -> str:
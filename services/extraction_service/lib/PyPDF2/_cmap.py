@@ -1,12 +1,12 @@
 import warnings
 from binascii import unhexlify
 from math import ceil
-from typing import Any, Dict, List, Tuple, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from ._codecs import adobe_glyphs, charset_encoding
 from ._utils import logger_warning
 from .errors import PdfReadWarning
-from .generic import DecodedStreamObject, DictionaryObject, StreamObject
+from .generic import DecodedStreamObject, DictionaryObject, IndirectObject, StreamObject
 
 
 # code freely inspired from @twiggy ; see #711
@@ -21,6 +21,13 @@ def build_char_map(
     font sub-type, space_width/2, encoding, map character-map, font-dictionary.
     The font-dictionary itself is suitable for the curious."""
     ft: DictionaryObject = obj["/Resources"]["/Font"][font_name]  # type: ignore
+    return build_char_map_from_dict(space_width, ft)
+
+
+def build_char_map_from_dict(
+    space_width: float, ft: DictionaryObject
+) -> Tuple[str, float, Union[str, Dict[int, str]], Dict, DictionaryObject]:
+    """build_char_map for the font dictionary ``ft`` itself."""
     font_type: str = cast(str, ft["/Subtype"])
 
     space_code = 32
@@ -68,6 +75,77 @@ def build_char_map(
     )
 
 
+# The standard 14 fonts, which a PDF may use without embedding or describing
+STANDARD_FONTS = frozenset(
+    (
+        "/Courier",
+        "/Courier-Bold",
+        "/Courier-BoldOblique",
+        "/Courier-Oblique",
+        "/Helvetica",
+        "/Helvetica-Bold",
+        "/Helvetica-BoldOblique",
+        "/Helvetica-Oblique",
+        "/Times-Roman",
+        "/Times-Bold",
+        "/Times-BoldItalic",
+        "/Times-Italic",
+        "/Symbol",
+        "/ZapfDingbats",
+    )
+)
+# Entries of a font dictionary that build_char_map_from_dict reads besides
+# /Subtype and /BaseFont
+_FONT_MAP_ENTRIES = ("/Encoding", "/ToUnicode", "/DescendantFonts", "/Widths")
+# Maps of bare standard fonts, shared by every reader: (/Subtype, /BaseFont,
+# space_width) -> build_char_map result without its font dictionary
+_standard_char_maps: Dict[
+    Tuple[str, str, float], Tuple[str, float, Union[str, Dict[int, str]], Dict]
+] = {}
+
+
+def cached_char_map(
+    font_name: str, space_width: float, obj: DictionaryObject, pdf: Any
+) -> Tuple[str, float, Union[str, Dict[int, str]], Dict, DictionaryObject]:
+    """build_char_map, reusing maps already built for ``pdf``.
+
+    Maps are kept in ``pdf.char_maps`` by the font dictionary's indirect
+    reference, so a font shared by many pages has its /ToUnicode CMap parsed
+    once per document; ``pdf.char_map_stats`` counts hits and misses. When
+    ``pdf.share_standard_char_maps`` is set, standard 14 fonts without an
+    encoding, CMap or widths of their own (whose map depends on nothing else)
+    are also shared between documents. A ``pdf`` without ``char_maps``, or a
+    font that is not an indirect object, is not cached.
+    """
+    fonts: DictionaryObject = obj["/Resources"]["/Font"]  # type: ignore
+    cache: Optional[Dict[Any, Any]] = getattr(pdf, "char_maps", None)
+    reference = fonts.raw_get(font_name)
+    if cache is None or not isinstance(reference, IndirectObject):
+        return build_char_map(font_name, space_width, obj)
+    stats: Dict[str, int] = pdf.char_map_stats
+    key = (reference.idnum, reference.generation, space_width)
+    if key in cache:
+        stats["hits"] += 1
+        return cache[key]
+    ft = cast(DictionaryObject, reference.get_object())
+    standard_key = None
+    if (
+        getattr(pdf, "share_standard_char_maps", False)
+        and ft.get("/BaseFont") in STANDARD_FONTS
+        and not any(entry in ft for entry in _FONT_MAP_ENTRIES)
+    ):
+        standard_key = (cast(str, ft["/Subtype"]), cast(str, ft["/BaseFont"]), space_width)
+        if standard_key in _standard_char_maps:
+            stats["hits"] += 1
+            cache[key] = _standard_char_maps[standard_key] + (ft,)
+            return cache[key]
+    stats["misses"] += 1
+    cache[key] = build_char_map_from_dict(space_width, ft)
+    if standard_key is not None:
+        _standard_char_maps[standard_key] = cache[key][:4]
+    return cache[key]
+
+
 # used when missing data, e.g. font def missing
 unknown_char_map: Tuple[str, float, Union[str, Dict[int, str]], Dict[Any, Any]] = (
     "Unknown",
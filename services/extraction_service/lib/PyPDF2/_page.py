@@ -45,7 +45,7 @@ from typing import (
     cast,
 )
 
-from ._cmap import build_char_map, unknown_char_map
+from ._cmap import cached_char_map, unknown_char_map
 from ._protocols import PdfReaderProtocol
 from ._utils import (
     CompressedTransformationMatrix,
@@ -80,6 +80,9 @@ CUSTOM_RTL_MIN: int = -1
 CUSTOM_RTL_MAX: int = -1
 CUSTOM_RTL_SPECIAL_CHARS: List[int] = []
 
+# Operators _extract_text acts on; without operand visitors nothing else is parsed
+TEXT_OPERATORS = frozenset(b"BT ET q Q cm Tz Tw TL Tf Td TD Tm T* Tj TJ ' \" Do".split())
+
 
 def set_custom_rtl(
     _min: Union[str, int, None] = None,
@@ -1339,7 +1342,7 @@ class PageObject(DictionaryObject):
             return ""  # no resources means no text is possible (no font) we consider the file as not damaged, no need to check for TJ or Tj
         if "/Font" in resources_dict:
             for f in cast(DictionaryObject, resources_dict["/Font"]):
-                cmaps[f] = build_char_map(f, space_width, obj)
+                cmaps[f] = cached_char_map(f, space_width, obj, pdf)
         cmap: Tuple[
             Union[str, Dict[int, str]], Dict[str, str], str, Optional[DictionaryObject]
         ] = (
@@ -1353,7 +1356,12 @@ class PageObject(DictionaryObject):
                 obj[content_key].get_object() if isinstance(content_key, str) else obj
             )
             if not isinstance(content, ContentStream):
-                content = ContentStream(content, pdf, "bytes")
+                operators = (
+                    TEXT_OPERATORS
+                    if visitor_operand_before is None and visitor_operand_after is None
+                    else None
+                )
+                content = ContentStream(content, pdf, "bytes", operators)
         except KeyError:  # it means no content can be extracted(certainly empty page)
             return ""
         # Note: we check all strings are TextStringObjects.  ByteStringObjects
@@ -56,11 +56,13 @@ from ._utils import (
     deprecation_no_replacement,
     deprecation_with_replacement,
     logger_warning,
+    open_mapped,
     read_non_whitespace,
     read_previous_line,
     read_until_whitespace,
     skip_over_comment,
     skip_over_whitespace,
+    stream_buffer,
 )
 from .constants import CatalogAttributes as CA
 from .constants import CatalogDictionary as CD
@@ -294,6 +296,10 @@ class PdfReader:
         Defaults to ``None``
     """
 
+    # Share the character maps of bare standard 14 fonts with other readers
+    # during text extraction; see _cmap.cached_char_map.
+    share_standard_char_maps = True
+
     def __init__(
         self,
         stream: Union[StrByteType, Path],
@@ -303,6 +309,9 @@ class PdfReader:
         self.strict = strict
         self.flattened_pages: Optional[List[PageObject]] = None
         self.resolved_objects: Dict[Tuple[Any, Any], Optional[PdfObject]] = {}
+        # build_char_map results by font reference, see _cmap.cached_char_map
+        self.char_maps: Dict[Tuple[int, int, float], Tuple[Any, ...]] = {}
+        self.char_map_stats: Dict[str, int] = {"hits": 0, "misses": 0}
         self.xref_index = 0
         self._page_id2num: Optional[
             Dict[Any, Any]
@@ -314,8 +323,7 @@ class PdfReader:
                 __name__,
             )
         if isinstance(stream, (str, Path)):
-            with open(stream, "rb") as fh:
-                stream = BytesIO(fh.read())
+            stream = open_mapped(stream)
         self.read(stream)
         self.stream = stream
 
@@ -1216,13 +1224,7 @@ class PdfReader:
             try:
                 idnum, generation = self.read_object_header(self.stream)
             except Exception:
-                if hasattr(self.stream, "getbuffer"):
-                    buf = bytes(self.stream.getbuffer())  # type: ignore
-                else:
-                    p = self.stream.tell()
-                    self.stream.seek(0, 0)
-                    buf = self.stream.read(-1)
-                    self.stream.seek(p, 0)
+                buf = stream_buffer(self.stream)
                 m = re.search(
                     rf"\s{indirect_reference.idnum}\s+{indirect_reference.generation}\s+obj".encode(),
                     buf,
@@ -1270,13 +1272,7 @@ class PdfReader:
                     retval, indirect_reference.idnum, indirect_reference.generation
                 )
         else:
-            if hasattr(self.stream, "getbuffer"):
-                buf = bytes(self.stream.getbuffer())  # type: ignore
-            else:
-                p = self.stream.tell()
-                self.stream.seek(0, 0)
-                buf = self.stream.read(-1)
-                self.stream.seek(p, 0)
+            buf = stream_buffer(self.stream)
             m = re.search(
                 rf"\s{indirect_reference.idnum}\s+{indirect_reference.generation}\s+obj".encode(),
                 buf,
@@ -1543,13 +1539,7 @@ class PdfReader:
                     offset, generation = int(offset_b), int(generation_b)
                 except Exception:
                     # if something wrong occured
-                    if hasattr(stream, "getbuffer"):
-                        buf = bytes(stream.getbuffer())  # type: ignore
-                    else:
-                        p = stream.tell()
-                        stream.seek(0, 0)
-                        buf = stream.read(-1)
-                        stream.seek(p)
+                    buf = stream_buffer(stream)
 
                     f = re.search(f"{num}\\s+(\\d+)\\s+obj".encode(), buf)
                     if f is None:
@@ -31,11 +31,12 @@ __author_email__ = "biziqe@mathieu.fenniak.net"
 
 import functools
 import logging
+import mmap
 import warnings
 from codecs import getencoder
 from dataclasses import dataclass
-from io import DEFAULT_BUFFER_SIZE
-from os import SEEK_CUR
+from io import DEFAULT_BUFFER_SIZE, BytesIO
+from os import SEEK_CUR, SEEK_END, SEEK_SET
 from typing import (
     IO,
     Any,
@@ -256,6 +257,59 @@ def mark_location(stream: StreamType) -> None:
     stream.seek(-radius, 1)
 
 
+class MappedFile(mmap.mmap):
+    """
+    Read-only memory-mapped file usable wherever the reader expects a stream.
+
+    Seeking mimics BytesIO: relative seeks before the start clamp to 0 and the
+    new position is returned. Seeks past the end clamp to the end, so reads
+    there return b"" just as they would on a BytesIO.
+    """
+
+    def seek(self, pos: int, whence: int = SEEK_SET) -> int:  # type: ignore[override]
+        if whence == SEEK_CUR:
+            pos += self.tell()
+        elif whence == SEEK_END:
+            pos += len(self)
+        elif pos < 0:
+            raise ValueError(f"negative seek value {pos}")
+        pos = min(max(pos, 0), len(self))
+        super().seek(pos)
+        return pos
+
+
+def open_mapped(path: Any) -> Union[MappedFile, BytesIO]:
+    """
+    Map a file read-only instead of copying it onto the heap.
+
+    Empty files and files on filesystems without mmap support are read into
+    a BytesIO instead.
+    """
+    with open(path, "rb") as fh:
+        try:
+            return MappedFile(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return BytesIO(fh.read())
+
+
+def stream_buffer(stream: StreamType) -> Any:
+    """
+    Return the whole stream as a bytes-like object for regex searches.
+
+    Mapped files and BytesIO are searched in place; other streams are read
+    into memory, restoring their position afterwards.
+    """
+    if isinstance(stream, mmap.mmap):
+        return stream
+    if hasattr(stream, "getbuffer"):
+        return stream.getbuffer()  # type: ignore
+    position = stream.tell()
+    stream.seek(0, 0)
+    buf = stream.read(-1)
+    stream.seek(position, 0)
+    return buf
+
+
 B_CACHE: Dict[Union[str, bytes], bytes] = {}
 
 
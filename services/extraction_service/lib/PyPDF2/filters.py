@@ -38,7 +38,7 @@ import math
 import struct
 import zlib
 from io import BytesIO
-from typing import Any, Dict, Optional, Tuple, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from .generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
 
@@ -49,7 +49,12 @@ except ImportError:
     # For older Python versions, the backport typing_extensions is necessary:
     from typing_extensions import Literal  # type: ignore[misc]
 
-from ._utils import b_, deprecate_with_replacement, ord_, paeth_predictor
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+from ._utils import b_, deprecate_with_replacement
 from .constants import CcittFaxDecodeParameters as CCITT
 from .constants import ColorSpaces
 from .constants import FilterTypeAbbreviations as FTA
@@ -146,49 +151,132 @@ class FlateDecode:
 
     @staticmethod
     def _decode_png_prediction(data: str, columns: int, rowlength: int) -> bytes:
-        output = BytesIO()
         # PNG prediction can vary from row to row
         if len(data) % rowlength != 0:
             raise PdfReadError("Image data is not rectangular")
-        prev_rowdata = (0,) * rowlength
-        for row in range(len(data) // rowlength):
-            rowdata = [
-                ord_(x) for x in data[(row * rowlength) : ((row + 1) * rowlength)]
-            ]
-            filter_byte = rowdata[0]
-
-            if filter_byte == 0:
-                pass
-            elif filter_byte == 1:
-                for i in range(2, rowlength):
-                    rowdata[i] = (rowdata[i] + rowdata[i - 1]) % 256
-            elif filter_byte == 2:
-                for i in range(1, rowlength):
-                    rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
-            elif filter_byte == 3:
-                for i in range(1, rowlength):
-                    left = rowdata[i - 1] if i > 1 else 0
-                    floor = math.floor(left + prev_rowdata[i]) / 2
-                    rowdata[i] = (rowdata[i] + int(floor)) % 256
-            elif filter_byte == 4:
-                for i in range(1, rowlength):
-                    left = rowdata[i - 1] if i > 1 else 0
-                    up = prev_rowdata[i]
-                    up_left = prev_rowdata[i - 1] if i > 1 else 0
-                    paeth = paeth_predictor(left, up, up_left)
-                    rowdata[i] = (rowdata[i] + paeth) % 256
-            else:
-                # unsupported PNG filter
-                raise PdfReadError(f"Unsupported PNG filter {filter_byte!r}")
-            prev_rowdata = tuple(rowdata)
-            output.write(bytearray(rowdata[1:]))
-        return output.getvalue()
+        if np is not None:
+            return _png_unpredict_numpy(b_(data), rowlength)
+        return _png_unpredict_python(b_(data), rowlength)
 
     @staticmethod
     def encode(data: bytes) -> bytes:
         return zlib.compress(data)
 
 
+def _png_unpredict_numpy(data: bytes, rowlength: int) -> bytes:
+    """
+    Undo PNG row filters with NumPy, a run of rows with the same filter at a time.
+
+    Sub and Up rows reduce to cumulative sums that wrap modulo 256 in uint8
+    (along the row for Sub, down the run of rows for Up). Average and Paeth
+    depend on the byte just decoded to their left and are undone row by row.
+    Like the original implementation, one byte per pixel is assumed.
+    """
+    if not data:
+        return b""
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, rowlength)
+    filter_bytes = rows[:, 0]
+    output = rows[:, 1:].copy()
+    prev_row = np.zeros(rowlength - 1, dtype=np.uint8)
+    boundaries = np.flatnonzero(np.diff(filter_bytes)) + 1
+    starts = [0, *boundaries.tolist()]
+    ends = [*boundaries.tolist(), len(rows)]
+    for start, end in zip(starts, ends):
+        filter_byte = int(filter_bytes[start])
+        block = output[start:end]
+        if filter_byte == 0:
+            pass
+        elif filter_byte == 1:
+            np.cumsum(block, axis=1, dtype=np.uint8, out=block)
+        elif filter_byte == 2:
+            np.cumsum(block, axis=0, dtype=np.uint8, out=block)
+            block += prev_row
+        elif filter_byte in (3, 4):
+            unfilter = _unfilter_average if filter_byte == 3 else _unfilter_paeth
+            prev = prev_row.tobytes()
+            for row in range(start, end):
+                prev = unfilter(output[row].tobytes(), prev)
+                output[row] = np.frombuffer(prev, dtype=np.uint8)
+        else:
+            # unsupported PNG filter
+            raise PdfReadError(f"Unsupported PNG filter {filter_byte!r}")
+        prev_row = output[end - 1]
+    return output.tobytes()
+
+
+def _png_unpredict_python(data: bytes, rowlength: int) -> bytes:
+    """
+    Undo PNG row filters on whole rows of bytes, without NumPy.
+
+    Each row is handled as one big integer holding a byte per lane. Up adds
+    the previous row lane by lane, and Sub is a prefix sum built from
+    log2(row length) shifted lane-wise additions; neither loops per byte.
+    """
+    width = rowlength - 1
+    low_bits = int.from_bytes(b"\x7f" * width, "big")
+    high_bits = int.from_bytes(b"\x80" * width, "big")
+
+    def add_lanes(a: int, b: int) -> int:
+        # Byte-wise addition mod 256: add the low seven bits, then xor the top bit
+        return ((a & low_bits) + (b & low_bits)) ^ ((a ^ b) & high_bits)
+
+    output = bytearray()
+    prev = bytes(width)
+    for offset in range(0, len(data), rowlength):
+        filter_byte = data[offset]
+        raw = data[offset + 1 : offset + rowlength]
+        if filter_byte == 0:
+            row = raw
+        elif filter_byte == 1:
+            value = int.from_bytes(raw, "big")
+            shift = 8
+            while shift < width * 8:
+                value = add_lanes(value, value >> shift)
+                shift <<= 1
+            row = value.to_bytes(width, "big")
+        elif filter_byte == 2:
+            value = add_lanes(int.from_bytes(raw, "big"), int.from_bytes(prev, "big"))
+            row = value.to_bytes(width, "big")
+        elif filter_byte == 3:
+            row = _unfilter_average(raw, prev)
+        elif filter_byte == 4:
+            row = _unfilter_paeth(raw, prev)
+        else:
+            # unsupported PNG filter
+            raise PdfReadError(f"Unsupported PNG filter {filter_byte!r}")
+        output += row
+        prev = row
+    return bytes(output)
+
+
+def _unfilter_average(raw: bytes, prev: bytes) -> bytes:
+    row = bytearray(raw)
+    left = 0
+    for i, up in enumerate(prev):
+        left = (row[i] + ((left + up) >> 1)) & 0xFF
+        row[i] = left
+    return bytes(row)
+
+
+def _unfilter_paeth(raw: bytes, prev: bytes) -> bytes:
+    row = bytearray(raw)
+    left = up_left = 0
+    for i, up in enumerate(prev):
+        # paeth_predictor, inlined
+        p = left + up - up_left
+        dist_left, dist_up, dist_up_left = abs(p - left), abs(p - up), abs(p - up_left)
+        if dist_left <= dist_up and dist_left <= dist_up_left:
+            predicted = left
+        elif dist_up <= dist_up_left:
+            predicted = up
+        else:
+            predicted = up_left
+        left = (row[i] + predicted) & 0xFF
+        row[i] = left
+        up_left = up
+    return bytes(row)
+
+
 class ASCIIHexDecode:
     """
     The ASCIIHexDecode filter decodes data that has been encoded in ASCII
@@ -240,42 +328,14 @@ class LZWDecode:
     """
 
     class Decoder:
+        STOP = 257
+        CLEARDICT = 256
+
         def __init__(self, data: bytes) -> None:
-            self.STOP = 257
-            self.CLEARDICT = 256
-            self.data = data
-            self.bytepos = 0
-            self.bitpos = 0
-            self.dict = [""] * 4096
-            for i in range(256):
-                self.dict[i] = chr(i)
-            self.reset_dict()
-
-        def reset_dict(self) -> None:
-            self.dictlen = 258
-            self.bitspercode = 9
-
-        def next_code(self) -> int:
-            fillbits = self.bitspercode
-            value = 0
-            while fillbits > 0:
-                if self.bytepos >= len(self.data):
-                    return -1
-                nextbits = ord_(self.data[self.bytepos])
-                bitsfromhere = 8 - self.bitpos
-                bitsfromhere = min(bitsfromhere, fillbits)
-                value |= (
-                    (nextbits >> (8 - self.bitpos - bitsfromhere))
-                    & (0xFF >> (8 - bitsfromhere))
-                ) << (fillbits - bitsfromhere)
-                fillbits -= bitsfromhere
-                self.bitpos += bitsfromhere
-                if self.bitpos >= 8:
-                    self.bitpos = 0
-                    self.bytepos = self.bytepos + 1
-            return value
-
-        def decode(self) -> str:
+            self.data = b_(data)
+            self.dict: List[bytes] = [bytes((i,)) for i in range(256)] + [b""] * (4096 - 256)
+
+        def decode(self) -> bytes:
             """
             TIFF 6.0 specification explains in sufficient details the steps to
             implement the LZW encode() and decode() algorithms.
@@ -284,45 +344,56 @@ class LZWDecode:
             http://www.rasip.fer.hr/research/compress/algorithms/fund/lz/lzw.html
             and the PDFReference
 
+            Codes are read MSB-first from an integer bit buffer refilled a byte
+            at a time, and strings are bytes appended to one growing bytearray,
+            so decoding is linear in the size of the output.
+
             :raises PdfReadError: If the stop code is missing
             """
+            data, table = self.data, self.dict
+            data_length = len(data)
+            output = bytearray()
+            bitbuffer = bitcount = bytepos = 0
+            bitspercode, dictlen = 9, 258
             cW = self.CLEARDICT
-            baos = ""
             while True:
                 pW = cW
-                cW = self.next_code()
-                if cW == -1:
-                    raise PdfReadError("Missed the stop code in LZWDecode!")
+                while bitcount < bitspercode:
+                    if bytepos >= data_length:
+                        raise PdfReadError("Missed the stop code in LZWDecode!")
+                    bitbuffer = (bitbuffer << 8) | data[bytepos]
+                    bytepos += 1
+                    bitcount += 8
+                bitcount -= bitspercode
+                cW = bitbuffer >> bitcount
+                bitbuffer &= (1 << bitcount) - 1
                 if cW == self.STOP:
                     break
                 elif cW == self.CLEARDICT:
-                    self.reset_dict()
+                    bitspercode, dictlen = 9, 258
                 elif pW == self.CLEARDICT:
-                    baos += self.dict[cW]
+                    output += table[cW]
                 else:
-                    if cW < self.dictlen:
-                        baos += self.dict[cW]
-                        p = self.dict[pW] + self.dict[cW][0]
-                        self.dict[self.dictlen] = p
-                        self.dictlen += 1
+                    previous = table[pW]
+                    if cW < dictlen:
+                        current = table[cW]
+                        entry = previous + current[:1]
                     else:
-                        p = self.dict[pW] + self.dict[pW][0]
-                        baos += p
-                        self.dict[self.dictlen] = p
-                        self.dictlen += 1
-                    if (
-                        self.dictlen >= (1 << self.bitspercode) - 1
-                        and self.bitspercode < 12
-                    ):
-                        self.bitspercode += 1
-            return baos
+                        entry = current = previous + previous[:1]
+                    output += current
+                    if dictlen < 4096:
+                        table[dictlen] = entry
+                        dictlen += 1
+                    if dictlen >= (1 << bitspercode) - 1 and bitspercode < 12:
+                        bitspercode += 1
+            return bytes(output)
 
     @staticmethod
     def decode(
         data: bytes,
         decode_parms: Union[None, ArrayObject, DictionaryObject] = None,
         **kwargs: Any,
-    ) -> str:
+    ) -> bytes:
         """
         :param data: ``bytes`` or ``str`` text to decode.
         :param decode_parms: a dictionary of parameter values.
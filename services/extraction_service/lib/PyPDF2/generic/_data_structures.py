@@ -31,8 +31,9 @@ __author_email__ = "biziqe@mathieu.fenniak.net"
 
 import logging
 import re
+from binascii import unhexlify
 from io import BytesIO
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union, cast
 
 from .._protocols import PdfWriterProtocol
 from .._utils import (
@@ -68,11 +69,57 @@ from ._base import (
     TextStringObject,
 )
 from ._fit import Fit
-from ._utils import read_hex_string_from_stream, read_string_from_stream
+from ._utils import (
+    create_string_object,
+    read_hex_string_from_stream,
+    read_string_from_stream,
+)
 
 logger = logging.getLogger(__name__)
 NumberSigns = b"+-"
 IndirectPattern = re.compile(rb"[+-]?(\d+)\s+(\d+)\s+R[^a-zA-Z]")
+# Cheap stand-in for IndirectPattern.search: looking for "R" first is many
+# times faster than trying IndirectPattern at every digit
+ReferenceHintPattern = re.compile(rb"R[^a-zA-Z]")
+# One token of a content stream, after optional whitespace. The token classes
+# mirror read_object and the byte-wise parser; dictionaries, stray delimiters
+# ("other") and strings with nested parentheses are left to read_object.
+ContentTokenPattern = re.compile(
+    rb"[\x00\t\n\x0c\r ]*(?:"
+    rb"(?P<number>[+\-.0-9][+,\-.0-9]*)"
+    rb"|(?P<operator>[A-Za-z'\"][^\s()<>\[\]{}/%]*)"
+    rb"|(?P<name>/[^\s()<>\[\]{}/%]*)"
+    rb"|(?P<string>\([^()\\]*(?:\\[\s\S][^()\\]*)*\))"
+    rb"|(?P<dict><<)"
+    rb"|(?P<dict_end>>>)"
+    rb"|(?P<hex><[0-9A-Fa-f\x00\t\n\r ]*>)"
+    rb"|(?P<array>\[)"
+    rb"|(?P<array_end>\])"
+    rb"|(?P<comment>%[^\r\n]*)"
+    rb"|(?P<other>[^\x00\t\n\x0c\r ])"
+    rb")"
+)
+# Any run of whitespace, comments and operands other than arrays and
+# dictionaries: what lies between two operators in most content
+OperandRunPattern = re.compile(
+    rb"(?:[\x00\t\n\x0c\r ]+"
+    rb"|[+\-.0-9][+,\-.0-9]*"
+    rb"|/[^\s()<>\[\]{}/%]*"
+    rb"|\([^()\\]*(?:\\[\s\S][^()\\]*)*\)"
+    rb"|<[0-9A-Fa-f\x00\t\n\r ]*>"
+    rb"|%[^\r\n]*)*"
+)
+# Escapes understood by read_string_from_stream; others are left to it for the warning
+StringEscapePattern = re.compile(rb"\\([0-7]{1,3}|\r[\r\n]?|\n[\r\n]?|[\s\S])")
+UnknownStringEscapePattern = re.compile(rb"\\[^0-7\r\nnrtbfc()/\\ %<>\[\]#_&$]")
+STRING_ESCAPES = {
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"c": rb"\c",
+}
 
 
 class ArrayObject(list, PdfObject):
@@ -844,13 +891,28 @@ class EncodedStreamObject(StreamObject):
 
 
 class ContentStream(DecodedStreamObject):
+    """
+    The operations of a page or form content stream.
+
+    ``operators``, if given, limits ``operations`` to those operators (use
+    b"BI" for inline images); the operands of all others are skipped without
+    being built. Such a stream is for reading only: its ``_data`` no longer
+    reproduces the original content.
+    """
+
+    # Scan decoded content with ContentTokenPattern instead of byte-wise
+    # stream reads; set to False to use the original parser.
+    use_regex_tokenizer = True
+
     def __init__(
         self,
         stream: Any,
         pdf: Any,
         forced_encoding: Union[None, str, List[str], Dict[int, str]] = None,
+        operators: Optional[Iterable[bytes]] = None,
     ) -> None:
         self.pdf = pdf
+        self.operators = None if operators is None else frozenset(operators)
 
         # The inner list has two elements:
         #  [0] : List
@@ -867,14 +929,12 @@ class ContentStream(DecodedStreamObject):
                     data += b_(s.get_object().get_data())
                     if len(data) == 0 or data[-1] != b"\n":
                         data += b"\n"
-                stream_bytes = BytesIO(data)
             else:
                 stream_data = stream.get_data()
                 assert stream_data is not None
-                stream_data_bytes = b_(stream_data)
-                stream_bytes = BytesIO(stream_data_bytes)
+                data = b_(stream_data)
             self.forced_encoding = forced_encoding
-            self.__parse_content_stream(stream_bytes)
+            self._parse_content(data)
 
     def clone(
         self,
@@ -912,6 +972,175 @@ class ContentStream(DecodedStreamObject):
         # super(DictionaryObject,self)._clone(src, pdf_dest, force_duplicate, ignore_fields)
         return
 
+    def _parse_content(self, data: bytes) -> None:
+        operators = self.operators
+        if not self.use_regex_tokenizer:
+            self.__parse_content_stream(BytesIO(data))
+            if operators is not None:
+                self.operations = [
+                    (operands, operator)
+                    for operands, operator in self.operations
+                    if operator in operators
+                    or (operator == b"INLINE IMAGE" and b"BI" in operators)
+                ]
+        elif operators is None:
+            self._tokenize_content(data, 0, len(data))
+        else:
+            self._scan_content(data, operators)
+
+    def _tokenize_content(self, data: bytes, start: int, end: int) -> List[Any]:
+        """
+        Split data[start:end] into (operands, operator) pairs in one pass.
+
+        Tokens come from ContentTokenPattern.finditer over the bytes, so there
+        are no per-byte reads or seeks. Numbers, names, strings and arrays of
+        them are built directly. Dictionaries, strings with nested parentheses
+        or unknown escapes, indirect references and inline images are read by
+        read_object and _read_inline_image from a BytesIO over the same bytes,
+        as in __parse_content_stream, and scanning resumes after them.
+
+        Returns the operands left over after the last operator.
+        """
+        forced_encoding = self.forced_encoding
+        operations = self.operations
+        operands: List[Union[int, str, PdfObject]] = []
+        # Arrays still open, innermost last; their values go to arrays[-1]
+        arrays: List[ArrayObject] = []
+        array_start = 0
+        # One search up front spares the per-number check in the usual case
+        indirect = IndirectPattern.match if _has_reference(data, start, end) else None
+        stream: Optional[BytesIO] = None
+        tokens = ContentTokenPattern.finditer(data, start, end)
+        while True:
+            for m in tokens:
+                kind = m.lastgroup
+                if kind == "number":
+                    if indirect is not None:
+                        number_start = m.start(kind)
+                        if indirect(data, number_start, number_start + 20) is not None:
+                            break
+                    token = m.group(kind)
+                    value = FloatObject(token) if b"." in token else NumberObject(token)
+                elif kind == "string":
+                    token = m.group(kind)
+                    if b"\\" in token:
+                        value = _content_operand(kind, token, forced_encoding)
+                        if value is None:
+                            break
+                    else:
+                        value = create_string_object(token[1:-1], forced_encoding)
+                elif kind == "operator":
+                    if arrays:
+                        break
+                    operator = m.group(kind)
+                    if operator == b"BI":
+                        # begin inline image
+                        assert operands == []
+                        if stream is None:
+                            stream = BytesIO(data)
+                        stream.seek(m.end())
+                        operations.append((self._read_inline_image(stream), b"INLINE IMAGE"))
+                        tokens = ContentTokenPattern.finditer(data, stream.tell(), end)
+                        break
+                    operations.append((operands, operator))
+                    operands = []
+                    continue
+                elif kind == "array":
+                    if not arrays:
+                        array_start = m.start(kind)
+                    arrays.append(ArrayObject())
+                    continue
+                elif kind == "array_end":
+                    if not arrays:
+                        break
+                    value = arrays.pop()
+                elif kind == "comment":
+                    continue
+                elif kind == "other":
+                    break
+                else:
+                    value = _content_operand(kind, m.group(kind), forced_encoding)
+                    if value is None:
+                        break
+                (arrays[-1] if arrays else operands).append(value)
+            else:
+                if not arrays:
+                    return operands
+                # An array is still open: read_object reports the truncation
+            if kind == "operator" and not arrays:
+                continue  # inline image, already read
+            # Not a simple token: let read_object parse it (or the array
+            # holding it) from its first byte, then carry on after it
+            if stream is None:
+                stream = BytesIO(data)
+            stream.seek(array_start if arrays else m.start(kind))
+            arrays.clear()
+            operands.append(read_object(stream, None, forced_encoding))
+            tokens = ContentTokenPattern.finditer(data, stream.tell(), end)
+
+    def _scan_content(self, data: bytes, operators: FrozenSet[bytes]) -> None:
+        """
+        Collect only the operations in ``operators``.
+
+        Nothing is built while scanning: runs of plain operands are passed
+        over by a single OperandRunPattern match, and when an operator is
+        reached its operands are read from the span since the previous one,
+        or dropped if the operator is not wanted. Array and dictionary
+        nesting is followed so that tokens inside them (true, false, null) are
+        not taken for operators.
+        """
+        operations = self.operations
+        # With "n g R" references about, numbers must be checked one by one
+        indirect = IndirectPattern.match if _has_reference(data, 0, len(data)) else None
+        skip_operands = OperandRunPattern.match if indirect is None else None
+        match = ContentTokenPattern.match
+        stream: Optional[BytesIO] = None
+        depth = 0
+        operand_start = pos = 0
+        while True:
+            if skip_operands is not None:
+                pos = skip_operands(data, pos).end()
+            m = match(data, pos)
+            if m is None:
+                return
+            kind = m.lastgroup
+            pos = m.end()
+            if kind == "operator":
+                if depth:
+                    continue
+                operator = m.group(kind)
+                if operator == b"BI":
+                    # the image data has to be read to find where it ends
+                    if stream is None:
+                        stream = BytesIO(data)
+                    stream.seek(pos)
+                    image = self._read_inline_image(stream)
+                    if operator in operators:
+                        operations.append((image, b"INLINE IMAGE"))
+                    operand_start = pos = stream.tell()
+                    continue
+                if operator in operators:
+                    operands = self._tokenize_content(data, operand_start, m.start(kind))
+                    operations.append((operands, operator))
+                operand_start = pos
+            elif kind == "number":
+                if indirect is not None:
+                    reference = indirect(data, m.start(kind), m.start(kind) + 20)
+                    if reference is not None:
+                        # step over "R", which would pass for an operator
+                        pos = reference.end() - 1
+            elif kind == "array" or kind == "dict":
+                depth += 1
+            elif kind == "array_end" or kind == "dict_end":
+                depth = max(depth - 1, 0)
+            elif kind == "other" and m.group(kind) == b"(":
+                # string with nested parentheses: find its end
+                if stream is None:
+                    stream = BytesIO(data)
+                stream.seek(m.start(kind))
+                read_string_from_stream(stream)
+                pos = stream.tell()
+
     def __parse_content_stream(self, stream: StreamType) -> None:
         stream.seek(0, 0)
         operands: List[Union[int, str, PdfObject]] = []
@@ -1024,7 +1253,52 @@ class ContentStream(DecodedStreamObject):
 
     @_data.setter
     def _data(self, value: Union[str, bytes]) -> None:
-        self.__parse_content_stream(BytesIO(b_(value)))
+        self._parse_content(b_(value))
+
+
+def _content_operand(
+    kind: str,
+    token: bytes,
+    forced_encoding: Union[None, str, List[str], Dict[int, str]],
+) -> Optional[PdfObject]:
+    """Build a name or string token of ContentTokenPattern; None defers to read_object"""
+    if kind == "name":
+        if b"#" in token:
+            return None
+        try:
+            return NameObject(token.decode("utf-8"))
+        except UnicodeDecodeError:
+            return None
+    if kind == "string":
+        body = token[1:-1]
+        if b"\\" in body:
+            if UnknownStringEscapePattern.search(body) is not None:
+                return None
+            body = StringEscapePattern.sub(_unescape, body)
+        return create_string_object(body, forced_encoding)
+    if kind == "hex":
+        digits = token[1:-1].translate(None, b" \n\r\t\x00")
+        if len(digits) % 2:
+            digits += b"0"
+        return create_string_object(unhexlify(digits), forced_encoding)
+    return None
+
+
+def _has_reference(data: bytes, start: int, end: int) -> bool:
+    return (
+        ReferenceHintPattern.search(data, start, end) is not None
+        and IndirectPattern.search(data, start, end) is not None
+    )
+
+
+def _unescape(m: "re.Match[bytes]") -> bytes:
+    escaped = m.group(1)
+    if escaped[0] in b"01234567":
+        return b_(chr(int(escaped, base=8)))
+    if escaped[0] in b"\r\n":
+        # escaped line break: dropped from the string
+        return b""
+    return STRING_ESCAPES.get(escaped, escaped)
 
 
 def read_object(
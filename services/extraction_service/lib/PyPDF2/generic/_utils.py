@@ -1,4 +1,5 @@
 import codecs
+import re
 from typing import Dict, List, Tuple, Union
 
 from .._codecs import _pdfdoc_encoding
@@ -6,6 +7,14 @@ from .._utils import StreamType, b_, logger_warning, read_non_whitespace
 from ..errors import STREAM_TRUNCATED_PREMATURELY, PdfStreamError
 from ._base import ByteStringObject, TextStringObject
 
+# Characters where PDFDocEncoding differs from Latin-1, and the bytes it leaves undefined
+_PDFDOC_TRANSLATION = {
+    i: c for i, c in enumerate(_pdfdoc_encoding) if c != chr(i) and c != "\u0000"
+}
+_PDFDOC_UNDEFINED = re.compile(
+    b"[" + b"".join(b"\\x%02x" % i for i, c in enumerate(_pdfdoc_encoding) if c == "\u0000") + b"]"
+)
+
 
 def hex_to_rgb(value: str) -> Tuple[float, float, float]:
     return tuple(int(value.lstrip("#")[i : i + 2], 16) / 255.0 for i in (0, 2, 4))  # type: ignore
@@ -157,16 +166,13 @@ def create_string_object(
 
 
 def decode_pdfdocencoding(byte_array: bytes) -> str:
-    retval = ""
-    for b in byte_array:
-        c = _pdfdoc_encoding[b]
-        if c == "\u0000":
-            raise UnicodeDecodeError(
-                "pdfdocencoding",
-                bytearray(b),
-                -1,
-                -1,
-                "does not exist in translation table",
-            )
-        retval += c
-    return retval
+    undefined = _PDFDOC_UNDEFINED.search(byte_array)
+    if undefined is not None:
+        raise UnicodeDecodeError(
+            "pdfdocencoding",
+            bytearray(byte_array[undefined.start()]),
+            -1,
+            -1,
+            "does not exist in translation table",
+        )
+    return byte_array.decode("latin-1").translate(_PDFDOC_TRANSLATION)
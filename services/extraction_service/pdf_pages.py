@@ -0,0 +1,60 @@
+"""Random access to PDF pages without flattening the whole page tree
+
+``PdfReader.pages`` resolves every page dictionary on first use. Over ranged S3
+reads that touches objects scattered through the entire file, so these helpers
+descend the /Pages tree along /Count instead and resolve only the pages read.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from PyPDF2 import PageObject  # type: ignore
+from PyPDF2.generic import IndirectObject  # type: ignore
+
+INHERITABLE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+def page_count(reader: Any) -> int:
+    try:
+        return int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except Exception:
+        return len(reader.pages)
+
+
+def page_at(reader: Any, index: int) -> PageObject:
+    """Resolve page ``index``, falling back to ``reader.pages`` for malformed trees"""
+    try:
+        return _descend(reader, index)
+    except Exception:
+        return reader.pages[index]
+
+
+def _descend(reader: Any, index: int) -> PageObject:
+    node = reader.trailer["/Root"]["/Pages"].get_object()
+    reference = None
+    inherited: Dict[str, Any] = {}
+    while "/Kids" in node:
+        for attr in INHERITABLE_ATTRIBUTES:
+            if attr in node:
+                inherited[attr] = node[attr]
+        kids = node["/Kids"]
+        if int(node.get("/Count", -1)) == len(kids) and index < len(kids):
+            # Every kid is a single page: jump straight to it
+            candidate = kids[index].get_object()
+            if "/Kids" not in candidate:
+                reference, node, index = kids[index], candidate, 0
+                continue
+        for kid in kids:
+            child = kid.get_object()
+            count = int(child.get("/Count", 0)) if "/Kids" in child else 1
+            if index < count:
+                reference, node = kid, child
+                break
+            index -= count
+        else:
+            raise IndexError("page index out of range")
+
+    page = PageObject(reader, reference if isinstance(reference, IndirectObject) else None)
+    page.update(inherited)
+    page.update(node)
+    return page
@@ -0,0 +1,119 @@
+"""Seekable read-only file over S3 ranged GETs, for parsing without a full download"""
+from __future__ import annotations
+
+import io
+import os
+from collections import OrderedDict
+from typing import Any, Dict
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+DEFAULT_MAX_BLOCKS = 64  # 16 MiB of cached blocks per open object
+
+
+class S3RangeFile(io.RawIOBase):
+    """Raw file whose reads are served from an LRU cache of fixed-size blocks
+
+    Missing blocks are fetched with ``Range`` GETs, consecutive misses in a
+    single request. PdfReader only touches the trailer, the xref table and the
+    objects needed for the pages it extracts, so a large PDF costs a handful of
+    small requests instead of a full download. Wrap it in ``io.BufferedReader``
+    (see ``open_s3_object``) so the parser's byte-at-a-time reads stay cheap.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        size: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_blocks: int = DEFAULT_MAX_BLOCKS,
+    ):
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._size = size
+        self._block_size = block_size
+        self._max_blocks = max_blocks
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._position = 0
+        self.stats: Dict[str, int] = {"requests": 0, "bytesFetched": 0, "hits": 0, "misses": 0}
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def readinto(self, buffer: Any) -> int:
+        end = min(self._position + len(buffer), self._size)
+        if self._position >= end:
+            return 0
+        data = self._read_range(self._position, end)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def _read_range(self, start: int, end: int) -> bytes:
+        first, last = start // self._block_size, (end - 1) // self._block_size
+        self._fetch_missing(first, last)
+        view = b"".join(self._blocks[index] for index in range(first, last + 1))
+        offset = start - first * self._block_size
+        return view[offset: offset + end - start]
+
+    def _fetch_missing(self, first: int, last: int) -> None:
+        missing = []
+        for index in range(first, last + 1):
+            if index in self._blocks:
+                self._blocks.move_to_end(index)
+                self.stats["hits"] += 1
+            else:
+                missing.append(index)
+                self.stats["misses"] += 1
+        # Coalesce runs of missing blocks into single ranged GETs
+        run_start = None
+        for position, index in enumerate(missing):
+            if run_start is None:
+                run_start = index
+            if position + 1 == len(missing) or missing[position + 1] != index + 1:
+                self._fetch_blocks(run_start, index)
+                run_start = None
+        while len(self._blocks) > max(self._max_blocks, last - first + 1):
+            self._blocks.popitem(last=False)
+
+    def _fetch_blocks(self, first: int, last: int) -> None:
+        start = first * self._block_size
+        end = min((last + 1) * self._block_size, self._size) - 1
+        resp = self._client.get_object(
+            Bucket=self._bucket, Key=self._key, Range=f"bytes={start}-{end}"
+        )
+        data = resp["Body"].read()
+        self.stats["requests"] += 1
+        self.stats["bytesFetched"] += len(data)
+        for index in range(first, last + 1):
+            offset = (index - first) * self._block_size
+            self._blocks[index] = data[offset: offset + self._block_size]
+
+
+def open_s3_object(
+    client: Any, bucket: str, key: str, size: int, block_size: int = DEFAULT_BLOCK_SIZE
+) -> io.BufferedReader:
+    return io.BufferedReader(S3RangeFile(client, bucket, key, size, block_size), buffer_size=64 * 1024)
@@ -0,0 +1,97 @@
+"""Shared buffered SQS producer flushing through send_message_batch"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_ENTRIES = 10  # SQS limit per SendMessageBatch call
+MAX_BATCH_BYTES = 256 * 1024  # SQS limit on the summed message sizes of one call
+
+
+class BufferedSqsProducer:
+    """Accumulate messages per queue and send them in batches of up to ten
+
+    ``send`` only buffers; ``flush`` (called once at the end of an invocation)
+    sends everything and retries entries SQS reports as failed. Each message may
+    carry a ``source`` (typically the consuming SQS record's messageId) so that
+    undeliverable messages can be traced back to the record that produced them.
+    """
+
+    def __init__(self, client: Any, max_attempts: int = 3, backoff_seconds: float = 0.1):
+        self._client = client
+        self._max_attempts = max_attempts
+        self._backoff_seconds = backoff_seconds
+        self._buffers: Dict[str, List[Tuple[Optional[str], str]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def send(self, queue_url: str, message: Any, source: Optional[str] = None) -> None:
+        body = message if isinstance(message, str) else json.dumps(message, default=str)
+        with self._lock:
+            self._buffers[queue_url].append((source, body))
+
+    def discard(self, source: str) -> None:
+        """Drop buffered messages produced by a record that later failed"""
+        with self._lock:
+            for queue_url, pending in self._buffers.items():
+                self._buffers[queue_url] = [entry for entry in pending if entry[0] != source]
+
+    def flush(self) -> Set[Optional[str]]:
+        """Send all buffered messages; return the sources of messages that never made it"""
+        with self._lock:
+            buffers, self._buffers = self._buffers, defaultdict(list)
+        failed_sources: Set[Optional[str]] = set()
+        for queue_url, pending in buffers.items():
+            for chunk in _chunks(pending):
+                failed_sources.update(self._send_chunk(queue_url, chunk))
+        return failed_sources
+
+    def _send_chunk(
+        self, queue_url: str, chunk: List[Tuple[Optional[str], str]]
+    ) -> Set[Optional[str]]:
+        remaining = {str(i): entry for i, entry in enumerate(chunk)}
+        permanent: Set[str] = set()
+        for attempt in range(self._max_attempts):
+            if attempt:
+                time.sleep(self._backoff_seconds * 2 ** (attempt - 1))
+            entries = [{"Id": entry_id, "MessageBody": body} for entry_id, (_, body) in remaining.items()]
+            try:
+                resp = self._client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+            except Exception:
+                logger.exception("send_message_batch to %s failed", queue_url)
+                continue
+            retry = {}
+            for failure in resp.get("Failed", []):
+                if failure.get("SenderFault"):
+                    logger.error("SQS rejected message for %s: %s", queue_url, failure.get("Message"))
+                    permanent.add(failure["Id"])
+                else:
+                    retry[failure["Id"]] = remaining[failure["Id"]]
+            remaining = retry
+            if not remaining:
+                break
+        undelivered = set(remaining) | permanent
+        return {chunk[int(entry_id)][0] for entry_id in undelivered}
+
+
+def _chunks(
+    pending: List[Tuple[Optional[str], str]]
+) -> List[List[Tuple[Optional[str], str]]]:
+    chunks: List[List[Tuple[Optional[str], str]]] = []
+    current: List[Tuple[Optional[str], str]] = []
+    size = 0
+    for entry in pending:
+        entry_size = len(entry[1].encode("utf-8"))
+        if current and (len(current) == MAX_BATCH_ENTRIES or size + entry_size > MAX_BATCH_BYTES):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(entry)
+        size += entry_size
+    if current:
+        chunks.append(current)
+    return chunks
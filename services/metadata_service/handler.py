@@ -1,38 +1,92 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
 from datetime import datetime
 from typing import Any, Dict
 
 import boto3
 
+from metadata_merge import build_update
+from search_index import document_term_stats, update_postings
+from sqs_batch import process_batch
+from sqs_producer import BufferedSqsProducer
+
+logger = logging.getLogger(__name__)
+
 dynamodb = boto3.resource("dynamodb")
 sqs = boto3.client("sqs")
+producer = BufferedSqsProducer(sqs)
 
 table = dynamodb.Table(os.environ.get("DOCUMENTS_TABLE", "DocumentsTable"))
+index_table = dynamodb.Table(os.environ.get("SEARCH_INDEX_TABLE", "SearchIndexTable"))
 classification_queue = os.environ.get("CLASSIFICATION_QUEUE_URL", "demo-classification-queue")
 
+# Attributes classification_service needs, carried in the message so it can skip
+# re-reading the item; envelopes over the limit fall back to {"documentId"} only
+CLASSIFICATION_FIELDS = (
+    "userId", "title", "summary", "keywords", "documentType", "filename",
+    "category", "subcategory", "contentHash", "deduplicatedFrom",
+)
+INLINE_METADATA_LIMIT = int(os.environ.get("INLINE_METADATA_LIMIT", str(64 * 1024)))
+
 
 def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
-    processed = 0
-    for record in event.get("Records", []):
-        body = json.loads(record["body"])
-        doc_id = body["documentId"]
-
-        existing = table.get_item(Key={"documentId": doc_id}).get("Item", {})
-        merged: Dict[str, Any] = {**existing, **body}
-        merged["documentId"] = doc_id
-        merged.setdefault("filename", existing.get("filename"))
-
-        if not merged.get("fileType") and merged.get("filename"):
-            merged["fileType"] = merged["filename"].rsplit(".", 1)[-1].lower()
-
-        merged["status"] = body.get("status", "extraction_completed")
-        merged["extractionStatus"] = body.get("extractionStatus", "completed")
-        merged["updatedAt"] = datetime.utcnow().isoformat()
-
-        table.put_item(Item=merged)
-        sqs.send_message(QueueUrl=classification_queue, MessageBody=json.dumps({"documentId": doc_id}))
-        processed += 1
-    return {"statusCode": 200, "body": json.dumps({"processed": processed})}
+    return process_batch(event, process_record, producer=producer)
+
+
+def process_record(record: Dict[str, Any]) -> None:
+    body = json.loads(record["body"])
+    doc_id = body["documentId"]
+
+    fields: Dict[str, Any] = dict(body)
+    if not fields.get("fileType") and fields.get("filename"):
+        fields["fileType"] = fields["filename"].rsplit(".", 1)[-1].lower()
+    fields["status"] = body.get("status", "extraction_completed")
+    fields["extractionStatus"] = body.get("extractionStatus", "completed")
+    fields["updatedAt"] = datetime.utcnow().isoformat()
+
+    # Precompute BM25 term statistics once, at write time
+    term_freqs = document_term_stats(fields)
+    fields["termFreqs"] = term_freqs
+
+    # One conditional write instead of get_item + put_item; ALL_OLD hands back
+    # the previous postings and owner without a separate read
+    try:
+        resp = table.update_item(
+            **build_update(
+                {"documentId": doc_id},
+                fields,
+                keep_existing=("filename", "fileType"),
+                condition="attribute_exists(documentId)",
+            ),
+            ReturnValues="ALL_OLD",
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.warning("Skipping metadata for unknown document %s", doc_id)
+        return
+    existing = resp.get("Attributes", {})
+
+    update_postings(
+        index_table,
+        existing.get("userId"),
+        doc_id,
+        term_freqs,
+        existing.get("termFreqs"),
+    )
+    merged = {**fields, **{k: existing[k] for k in ("filename", "fileType") if existing.get(k)}}
+    merged["userId"] = existing.get("userId")
+    producer.send(
+        classification_queue,
+        classification_message(doc_id, merged),
+        source=record.get("messageId"),
+    )
+
+
+def classification_message(doc_id: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = {k: item[k] for k in CLASSIFICATION_FIELDS if item.get(k) is not None}
+    message = {"documentId": doc_id, "metadata": metadata}
+    if len(json.dumps(message, default=str).encode("utf-8")) > INLINE_METADATA_LIMIT:
+        return {"documentId": doc_id}
+    return message
@@ -0,0 +1,46 @@
+"""Compile incoming metadata into a single DynamoDB UpdateItem request"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable
+
+
+def build_update(
+    key: Dict[str, Any],
+    fields: Dict[str, Any],
+    keep_existing: Iterable[str] = (),
+    condition: str | None = None,
+) -> Dict[str, Any]:
+    """Return update_item kwargs that SET only the given attributes
+
+    Attributes named in ``keep_existing`` are written with ``if_not_exists`` so a
+    value already on the item wins. Key attributes and ``None`` values are skipped.
+    Every attribute goes through a ``#name`` placeholder, which sidesteps
+    DynamoDB reserved words such as ``status``.
+    """
+    keep_existing = set(keep_existing)
+    names: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
+    assignments = []
+    for index, (attr, value) in enumerate(sorted(fields.items())):
+        if attr in key or value is None:
+            continue
+        name, placeholder = f"#a{index}", f":v{index}"
+        names[name] = attr
+        values[placeholder] = value
+        if attr in keep_existing:
+            assignments.append(f"{name}=if_not_exists({name}, {placeholder})")
+        else:
+            assignments.append(f"{name}={placeholder}")
+
+    if not assignments:
+        raise ValueError("No attributes to update")
+
+    request: Dict[str, Any] = {
+        "Key": key,
+        "UpdateExpression": "SET " + ", ".join(assignments),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+    if condition:
+        request["ConditionExpression"] = condition
+    return request
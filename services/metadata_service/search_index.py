@@ -0,0 +1,138 @@
+"""Shared per-user inverted keyword index for document search"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Set
+
+from boto3.dynamodb.conditions import Key
+
+# Field weights applied to term frequencies, so a title hit counts more than a summary hit
+FIELD_WEIGHTS = {
+    "title": 3,
+    "keywords": 2,
+    "filename": 2,
+    "summary": 1,
+    "documentType": 1,
+    "category": 1,
+}
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MAX_TOKENS_PER_DOCUMENT = 500
+STATS_KEY = "#stats"
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def document_term_stats(item: Dict[str, Any]) -> Dict[str, int]:
+    """Compute field-weighted term frequencies over every indexed field of a document"""
+    counts: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = item.get(field)
+        if isinstance(value, (list, tuple, set)):
+            value = " ".join(str(v) for v in value)
+        if isinstance(value, str):
+            for token in tokenize(value):
+                counts[token] += weight
+    return dict(counts.most_common(MAX_TOKENS_PER_DOCUMENT))
+
+
+def posting_key(token: str, doc_id: str) -> str:
+    return f"{token}#{doc_id}"
+
+
+def update_postings(
+    index_table: Any,
+    user_id: str,
+    doc_id: str,
+    term_freqs: Dict[str, int],
+    previous_term_freqs: Dict[str, Any] | None = None,
+) -> None:
+    """Rewrite changed postings, drop vanished ones and keep the user's corpus stats current"""
+    if not user_id:
+        return
+    previous = {token: int(tf) for token, tf in (previous_term_freqs or {}).items()}
+    doc_length = sum(term_freqs.values())
+    previous_length = sum(previous.values())
+    stale = set(previous) - set(term_freqs)
+    changed = {
+        token: tf
+        for token, tf in term_freqs.items()
+        if previous.get(token) != tf or previous_length != doc_length
+    }
+    if not stale and not changed:
+        return
+    with index_table.batch_writer() as batch:
+        for token in stale:
+            batch.delete_item(Key={"userId": user_id, "tokenDoc": posting_key(token, doc_id)})
+        for token, tf in changed.items():
+            batch.put_item(
+                Item={
+                    "userId": user_id,
+                    "tokenDoc": posting_key(token, doc_id),
+                    "documentId": doc_id,
+                    "tf": tf,
+                    "docLength": doc_length,
+                }
+            )
+    doc_delta = int(bool(term_freqs)) - int(bool(previous))
+    index_table.update_item(
+        Key={"userId": user_id, "tokenDoc": STATS_KEY},
+        UpdateExpression="ADD docCount :docs, totalLength :length",
+        ExpressionAttributeValues={
+            ":docs": doc_delta,
+            ":length": doc_length - previous_length,
+        },
+    )
+
+
+def corpus_stats(index_table: Any, user_id: str) -> Dict[str, float]:
+    """Return the user's document count and average weighted document length"""
+    item = index_table.get_item(Key={"userId": user_id, "tokenDoc": STATS_KEY}).get("Item", {})
+    doc_count = max(int(item.get("docCount", 0)), 0)
+    total_length = max(float(item.get("totalLength", 0)), 0.0)
+    return {
+        "docCount": doc_count,
+        "avgLength": total_length / doc_count if doc_count else 0.0,
+    }
+
+
+def lookup_postings(index_table: Any, user_id: str, token: str) -> Dict[str, Dict[str, float]]:
+    """Return {documentId: {tf, docLength}} for the user's terms starting with `token`"""
+    postings: Dict[str, Dict[str, float]] = {}
+    kwargs: Dict[str, Any] = {
+        "KeyConditionExpression": Key("userId").eq(user_id)
+        & Key("tokenDoc").begins_with(token),
+        "ProjectionExpression": "documentId, tf, docLength",
+    }
+    while True:
+        resp = index_table.query(**kwargs)
+        for item in resp.get("Items", []):
+            entry = postings.setdefault(
+                item["documentId"],
+                {"tf": 0.0, "docLength": float(item.get("docLength", 0))},
+            )
+            # A prefix can match several terms of the same document
+            entry["tf"] += float(item.get("tf", 1))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        kwargs["ExclusiveStartKey"] = last_key
+    return postings
+
+
+def query_postings(
+    index_table: Any, user_id: str, query: str
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Look up every query token; empty when no document contains all of them"""
+    by_token: Dict[str, Dict[str, Dict[str, float]]] = {}
+    candidates: Set[str] | None = None
+    for token in sorted(set(tokenize(query)), key=len, reverse=True):
+        postings = lookup_postings(index_table, user_id, token)
+        candidates = set(postings) if candidates is None else candidates & set(postings)
+        if not candidates:
+            return {}
+        by_token[token] = postings
+    return by_token
@@ -6,14 +6,16 @@ from typing import Any, Dict
 
 import boto3
 
+from sqs_batch import process_batch
+
 sns = boto3.client("sns")
 TOPIC_ARN = os.environ.get("NOTIFICATION_TOPIC_ARN", "demo-topic")
 
 
 def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
-    notified = 0
-    for record in event.get("Records", []):
-        body = json.loads(record.get("body", "{}"))
-        sns.publish(TopicArn=TOPIC_ARN, Message=json.dumps(body), Subject="Document Update")
-        notified += 1
-    return {"statusCode": 200, "body": json.dumps({"notified": notified})}
+    return process_batch(event, process_record)
+
+
+def process_record(record: Dict[str, Any]) -> None:
+    body = json.loads(record.get("body", "{}"))
+    sns.publish(TopicArn=TOPIC_ARN, Message=json.dumps(body), Subject="Document Update")
@@ -0,0 +1,40 @@
+"""Shared query helpers for per-user document reads"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterator, Optional
+
+from boto3.dynamodb.conditions import Key
+
+USER_DOCUMENTS_INDEX = os.environ.get("USER_DOCUMENTS_INDEX", "UserUpdatedAtIndex")
+INDEX_KEY_ATTRIBUTES = ("documentId", "userId", "updatedAt")
+
+
+def iter_user_documents(
+    table: Any,
+    user_id: str,
+    newest_first: bool = True,
+    page_size: int = 50,
+    start_key: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield a user's documents ordered by updatedAt, fetching pages only as consumed"""
+    kwargs: Dict[str, Any] = {
+        "IndexName": USER_DOCUMENTS_INDEX,
+        "KeyConditionExpression": Key("userId").eq(user_id),
+        "ScanIndexForward": not newest_first,
+        "Limit": page_size,
+    }
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+    while True:
+        resp = table.query(**kwargs)
+        yield from resp.get("Items", [])
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def index_position(item: Dict[str, Any]) -> Dict[str, Any]:
+    """ExclusiveStartKey that resumes the index query right after `item`"""
+    return {name: item[name] for name in INDEX_KEY_ATTRIBUTES if name in item}
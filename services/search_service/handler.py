@@ -1,17 +1,27 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import json
 import os
-from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 import boto3
 
 # Import authentication utilities
 from auth_utils import get_user_from_token
+from document_store import INDEX_KEY_ATTRIBUTES, index_position, iter_user_documents
+from ranking import bm25_scores
+from search_index import corpus_stats, query_postings, tokenize
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(os.environ.get("DOCUMENTS_TABLE", "DocumentsTable"))
+index_table = dynamodb.Table(os.environ.get("SEARCH_INDEX_TABLE", "SearchIndexTable"))
+
+BATCH_GET_LIMIT = 100
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+INTERNAL_FIELDS = ("termFreqs",)
 
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -36,10 +46,47 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
         category_filter = (params.get("category") or "").strip().lower()
         type_filter = (params.get("type") or "").strip().lower()
         status_filter = (params.get("status") or "").strip().lower()
-        limit = min(int(params.get("limit") or 50), 200)
-
-        items = _scan_all_items(user_id)  # Only get current user's files
-        filtered: List[Dict[str, Any]] = []
+        try:
+            limit = int(params.get("limit") or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            return _response(400, {"message": "limit must be an integer"})
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        filters = [category_filter, type_filter, status_filter]
+
+        cursor: Dict[str, Any] = {}
+        if params.get("cursor"):
+            cursor = _decode_cursor(params["cursor"])
+            if (
+                cursor is None
+                or cursor.get("q") != query
+                or cursor.get("f") != filters
+                or not _valid_position(cursor, query, user_id)
+            ):
+                return _response(400, {"message": "Invalid cursor"})
+
+        items: Iterable[Dict[str, Any]]
+        if query:
+            # Rank from the postings alone, then read documents best match first
+            stats = corpus_stats(index_table, user_id)
+            ranked = bm25_scores(
+                query_postings(index_table, user_id, query),
+                stats["docCount"],
+                stats["avgLength"],
+            )
+            if cursor:
+                # Resume right after the last (score, documentId) already returned.
+                # Only the document reads are saved: every page still reads all
+                # postings of every token and rescores them.
+                last = (-float(cursor["score"]), cursor["id"])
+                ranked = [pair for pair in ranked if (-pair[1], pair[0]) > last]
+            items = _iter_ranked_items(ranked, user_id)
+        else:
+            # Newest first straight from the userId/updatedAt index
+            items = iter_user_documents(
+                table, user_id, page_size=limit, start_key=cursor.get("key")
+            )
+
+        results: List[Dict[str, Any]] = []
         for item in items:
             if not _matches_query(item, query):
                 continue
@@ -49,19 +96,26 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
                 continue
             if status_filter and _extract_status(item) != status_filter:
                 continue
-            filtered.append(item)
-
-        sorted_results = sorted(
-            filtered,
-            key=lambda x: _to_datetime(x.get("updatedAt") or x.get("uploadTimestamp")),
-            reverse=True,
-        )
+            results.append(item)
+            if len(results) >= limit:
+                break
+
+        next_cursor = None
+        if results and len(results) >= limit:
+            last_item = results[-1]
+            position: Dict[str, Any] = (
+                {"score": last_item["score"], "id": last_item["documentId"]}
+                if query
+                else {"key": index_position(last_item)}
+            )
+            next_cursor = _encode_cursor({"q": query, "f": filters, **position})
 
         return _response(
             200,
             {
-                "results": sorted_results[:limit],
-                "count": len(sorted_results[:limit]),
+                "results": [_public_view(item) for item in results],
+                "count": len(results),
+                "nextCursor": next_cursor,
                 "query": query,
                 "filters": {
                     "category": category_filter,
@@ -74,25 +128,37 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
         return _response(500, {"message": str(err)})
 
 
-def _scan_all_items(user_id: str) -> List[Dict[str, Any]]:
-    """Scan all documents but only return documents for the specified user"""
-    items: List[Dict[str, Any]] = []
-    kwargs: Dict[str, Any] = {}
-    while True:
-        resp = table.scan(**kwargs)
-        # Filter documents for current user
-        user_items = [
-            item for item in resp.get("Items", []) if item.get("userId") == user_id
-        ]
-        items.extend(user_items)
-        last_key = resp.get("LastEvaluatedKey")
-        if not last_key:
-            break
-        kwargs["ExclusiveStartKey"] = last_key
+def _iter_ranked_items(
+    ranked: List[Tuple[str, float]], user_id: str
+) -> Iterator[Dict[str, Any]]:
+    """Yield ranked documents in score order, batch-reading one chunk at a time"""
+    for start in range(0, len(ranked), BATCH_GET_LIMIT):
+        chunk = ranked[start : start + BATCH_GET_LIMIT]
+        items = _get_items([doc_id for doc_id, _score in chunk], user_id)
+        for doc_id, score in chunk:
+            item = items.get(doc_id)
+            if item is not None:
+                item["score"] = score
+                yield item
+
+
+def _get_items(doc_ids: List[str], user_id: str) -> Dict[str, Dict[str, Any]]:
+    """Batch-read candidate documents, keeping only those owned by the user"""
+    items: Dict[str, Dict[str, Any]] = {}
+    request: Dict[str, Any] = {
+        table.name: {"Keys": [{"documentId": doc_id} for doc_id in doc_ids]}
+    }
+    while request:
+        resp = dynamodb.batch_get_item(RequestItems=request)
+        for item in resp.get("Responses", {}).get(table.name, []):
+            if item.get("userId") == user_id:
+                items[item["documentId"]] = item
+        request = resp.get("UnprocessedKeys") or {}
     return items
 
 
 def _matches_query(item: Dict[str, Any], query: str) -> bool:
+    """Every query token must prefix some word of the indexed fields"""
     if not query:
         return True
     haystack = " ".join(
@@ -101,12 +167,17 @@ def _matches_query(item: Dict[str, Any], query: str) -> bool:
             [
                 item.get("title", ""),
                 item.get("summary", ""),
+                " ".join(str(k) for k in item.get("keywords") or []),
                 item.get("filename", ""),
                 item.get("documentType", ""),
+                item.get("category", ""),
             ],
         )
-    ).lower()
-    return query in haystack
+    )
+    words = set(tokenize(haystack))
+    return all(
+        any(word.startswith(token) for word in words) for token in tokenize(query)
+    )
 
 
 def _extract_file_type(item: Dict[str, Any]) -> str:
@@ -127,20 +198,46 @@ def _extract_status(item: Dict[str, Any]) -> str:
     return ""
 
 
-def _to_datetime(value: Any) -> datetime:
-    if not value:
-        return datetime.min
+def _valid_position(cursor: Dict[str, Any], query: str, user_id: str) -> bool:
+    """A well-formed cursor may still lack, or mistype, the position it resumes from
+
+    Listing cursors are DynamoDB ``ExclusiveStartKey`` values: a partial key
+    is rejected by DynamoDB, and one for another user would page through their
+    partition, so both fail validation here.
+    """
+    if query:
+        score = cursor.get("score")
+        return (
+            isinstance(score, (int, float))
+            and not isinstance(score, bool)
+            and isinstance(cursor.get("id"), str)
+        )
+    key = cursor.get("key")
+    return (
+        isinstance(key, dict)
+        and set(key) == set(INDEX_KEY_ATTRIBUTES)
+        and all(isinstance(value, str) for value in key.values())
+        and key["userId"] == user_id
+    )
+
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    """Opaque continuation token: the last sort key of the page, base64url-encoded"""
+    raw = json.dumps(state, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str) -> Dict[str, Any] | None:
     try:
-        if isinstance(value, (int, float)):
-            return datetime.fromtimestamp(float(value))
-        if isinstance(value, str):
-            try:
-                return datetime.fromisoformat(value)
-            except ValueError:
-                return datetime.fromtimestamp(float(value))
-    except Exception:
-        return datetime.min
-    return datetime.min
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, ValueError, UnicodeError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def _public_view(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in item.items() if key not in INTERNAL_FIELDS}
 
 
 def _response(status: int, body: Dict[str, Any]) -> Dict[str, Any]:
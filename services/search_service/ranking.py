@@ -0,0 +1,36 @@
+"""BM25 ranking over the precomputed postings of the search index"""
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Tuple
+
+K1 = 1.2
+B = 0.75
+
+
+def bm25_scores(
+    postings_by_token: Dict[str, Dict[str, Dict[str, float]]],
+    doc_count: int,
+    avg_length: float,
+) -> List[Tuple[str, float]]:
+    """Score documents present in every token's postings, best match first"""
+    if not postings_by_token:
+        return []
+    candidates = set.intersection(*(set(p) for p in postings_by_token.values()))
+    # Postings may be ahead of the stats item; never let df exceed N
+    n = max(doc_count, max(len(p) for p in postings_by_token.values()))
+    avg_length = avg_length or 1.0
+
+    scores: Dict[str, float] = {doc_id: 0.0 for doc_id in candidates}
+    for postings in postings_by_token.values():
+        df = len(postings)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for doc_id in candidates:
+            tf = postings[doc_id]["tf"]
+            doc_length = postings[doc_id]["docLength"] or avg_length
+            norm = K1 * (1 - B + B * doc_length / avg_length)
+            scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+    # Rounded so scores survive a JSON round trip through the pagination cursor;
+    # documentId breaks ties so the order is stable across requests
+    rounded = [(doc_id, round(score, 6)) for doc_id, score in scores.items()]
+    return sorted(rounded, key=lambda pair: (-pair[1], pair[0]))
@@ -0,0 +1,103 @@
+"""Shared two-tier cache for LLM responses keyed by model + prompt fingerprint"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_TABLE = os.environ.get("LLM_CACHE_TABLE", "LlmCacheTable")
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "256"))
+# Responses above this size are not persisted (DynamoDB items cap at 400 KB)
+MAX_RESPONSE_BYTES = 300 * 1024
+
+
+def cache_key(payload: Dict[str, Any]) -> str:
+    """Fingerprint a chat completion request: model plus a hash of everything else"""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{payload.get('model', '')}#{digest}"
+
+
+class LlmCache:
+    """In-memory LRU in front of a DynamoDB table with TTL
+
+    The LRU survives between invocations of a warm Lambda and is bounded by
+    ``max_entries``; the table is shared by all instances and expires items
+    through DynamoDB TTL on ``expiresAt``. Cache failures are logged and treated
+    as misses so they never fail the document being processed. One low-level
+    DynamoDB client, which is thread-safe, is shared by all threads.
+    """
+
+    def __init__(
+        self,
+        table_name: str = LLM_CACHE_TABLE,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        client: Any = None,
+    ):
+        self._client = client if client is not None else boto3.client("dynamodb")
+        self._table_name = table_name
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, payload: Dict[str, Any]) -> Optional[str]:
+        key = cache_key(payload)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        try:
+            item = self._client.get_item(
+                TableName=self._table_name, Key={"cacheKey": {"S": key}}
+            ).get("Item")
+        except Exception:
+            logger.exception("LLM cache lookup failed")
+            return None
+        # TTL deletion is lazy, so expired items can still be returned for a while
+        if not item or int(item.get("expiresAt", {}).get("N", 0)) <= now:
+            return None
+        response = item["response"]["S"]
+        self._remember(key, float(item["expiresAt"]["N"]), response)
+        return response
+
+    def put(self, payload: Dict[str, Any], response: str) -> None:
+        key = cache_key(payload)
+        expires_at = int(time.time()) + self._ttl_seconds
+        self._remember(key, float(expires_at), response)
+        if len(response.encode("utf-8")) > MAX_RESPONSE_BYTES:
+            return
+        try:
+            self._client.put_item(
+                TableName=self._table_name,
+                Item={
+                    "cacheKey": {"S": key},
+                    "model": {"S": str(payload.get("model", ""))},
+                    "response": {"S": response},
+                    "expiresAt": {"N": str(expires_at)},
+                },
+            )
+        except Exception:
+            logger.exception("LLM cache write failed")
+
+    def _remember(self, key: str, expires_at: float, response: str) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
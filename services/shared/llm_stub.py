@@ -0,0 +1,86 @@
+"""Local stand-in for the chat completions API, for tests and offline runs
+
+    with LlmStub(responses=[{"category": "invoice"}]) as stub:
+        client = LlmClient("test-key", base_url=stub.base_url)
+
+Each queued response is either a dict (returned as the JSON message content)
+or an ``(status, headers)`` tuple to simulate throttling and server errors.
+Once the queue is empty the ``default`` content is served.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+class LlmStub:
+    def __init__(self, responses: Optional[List[Any]] = None, default: Optional[Dict[str, Any]] = None):
+        self.responses = list(responses or [])
+        self.default = default or {}
+        self.requests: List[Dict[str, Any]] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> "LlmStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next(self, payload: Dict[str, Any]) -> Any:
+        with self._lock:
+            self.requests.append(payload)
+            return self.responses.pop(0) if self.responses else self.default
+
+    def _handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, as the real API does
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                response = stub._next(payload)
+                if isinstance(response, tuple):
+                    status, headers = response
+                    self._send(status, b"{}", headers)
+                    return
+                body = json.dumps(
+                    {
+                        "choices": [{"message": {"role": "assistant", "content": json.dumps(response)}}],
+                        "usage": {"prompt_tokens": len(json.dumps(payload)) // 4, "completion_tokens": 10},
+                    }
+                ).encode("utf-8")
+                self._send(200, body, {})
+
+            def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args: Any) -> None:
+                pass
+
+        return Handler
@@ -10,6 +10,7 @@ import boto3
 
 # Import authentication utilities
 from auth_utils import get_user_from_token
+from sqs_batch import process_batch
 
 
 dynamodb = boto3.resource("dynamodb")
@@ -23,28 +24,30 @@ CORS_HEADERS = {
 
 
 def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
+    if event.get("Records"):
+        # SQS status events: failures are reported per record, not swallowed
+        return process_batch(event, record_status_event)
+
     try:
         if event.get("httpMethod") == "GET":
             return handle_get(event)
-
-        processed = 0
-        for record in event.get("Records", []):
-            body = json.loads(record.get("body", "{}"))
-            table.put_item(
-                Item={
-                    "documentId": body.get("documentId"),
-                    "timestamp": body.get("timestamp"),
-                    "status": body.get("status"),
-                    "message": body.get("message"),
-                }
-            )
-            processed += 1
-        return response(200, {"message": "recorded", "count": processed})
-
+        return response(400, {"message": "Unsupported request"})
     except Exception as err:
         return response(500, {"message": str(err)})
 
 
+def record_status_event(record: Dict[str, Any]) -> None:
+    body = json.loads(record.get("body", "{}"))
+    table.put_item(
+        Item={
+            "documentId": body.get("documentId"),
+            "timestamp": body.get("timestamp"),
+            "status": body.get("status"),
+            "message": body.get("message"),
+        }
+    )
+
+
 def handle_get(event: Dict[str, Any]) -> Dict[str, Any]:
     # Verify user identity
     headers = event.get("headers") or {}
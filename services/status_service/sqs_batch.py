@@ -0,0 +1,67 @@
+"""Shared SQS batch processing with partial batch failure reporting"""
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def process_batch(
+    event: Dict[str, Any],
+    handle_record: Callable[[Dict[str, Any]], Any],
+    max_workers: int = 1,
+    producer: Any = None,
+) -> Dict[str, Any]:
+    """Handle each SQS record independently and report only the failed ones
+
+    Requires ``report_batch_item_failures`` on the event source mapping; SQS then
+    redelivers just the records listed in ``batchItemFailures`` instead of the
+    whole batch. With ``max_workers > 1`` records run on a bounded thread pool,
+    which overlaps I/O-bound work (S3 reads, HTTP calls) across the batch.
+
+    When a ``BufferedSqsProducer`` is given it is flushed once after all records
+    ran; messages of failed records are dropped, and records whose messages
+    could not be delivered are reported as failed too.
+    """
+    records = event.get("Records", [])
+
+    def run(record: Dict[str, Any]) -> bool:
+        try:
+            handle_record(record)
+            return True
+        except Exception:
+            logger.exception("Failed to process SQS message %s", record.get("messageId"))
+            if producer is not None:
+                producer.discard(record.get("messageId"))
+            return False
+
+    if max_workers > 1 and len(records) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(records))) as pool:
+            outcomes = list(pool.map(run, records))
+    else:
+        outcomes = [run(record) for record in records]
+
+    if producer is not None:
+        undelivered = producer.flush()
+        outcomes = [
+            ok and record.get("messageId") not in undelivered
+            for record, ok in zip(records, outcomes)
+        ]
+
+    failures = [
+        {"itemIdentifier": record.get("messageId", "")}
+        for record, ok in zip(records, outcomes)
+        if not ok
+    ]
+    return batch_response(len(records) - len(failures), failures)
+
+
+def batch_response(processed: int, failures: List[Dict[str, str]]) -> Dict[str, Any]:
+    return {
+        "batchItemFailures": failures,
+        "statusCode": 200,
+        "body": json.dumps({"processed": processed, "failed": len(failures)}),
+    }
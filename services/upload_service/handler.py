@@ -4,25 +4,32 @@ from __future__ import annotations
 
 import base64
 import json
+import math
 import os
 import uuid
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import boto3
 import mimetypes
+from botocore.exceptions import ClientError
 
 # Import authentication utilities
 from auth_utils import get_user_from_token
 
 s3 = boto3.client("s3")
-sqs = boto3.client("sqs")
 dynamodb = boto3.resource("dynamodb")
 
 DOC_BUCKET = os.environ.get("DOCUMENTS_BUCKET", "demo-docs")
-EXTRACTION_QUEUE = os.environ.get("EXTRACTION_QUEUE_URL", "demo-queue")
 DOCUMENTS_TABLE = dynamodb.Table(os.environ.get("DOCUMENTS_TABLE", "DocumentsTable"))
 
+PRESIGN_EXPIRES = 900  # 15 minutes, same as storage_service
+PART_SIZE = int(os.environ.get("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+MAX_PARTS = 10000  # S3 multipart limit
+# With 8 MiB parts this is 640 presigned part URLs, well inside Lambda's 6 MB
+# response limit; MAX_PARTS URLs would not fit
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(5 * 1024 ** 3)))
+
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
     "Access-Control-Allow-Headers": "*",
@@ -40,11 +47,120 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
 
     user_id = user_info.get("userId")
 
-    body = json.loads(event.get("body") or "{}")
+    try:
+        body = json.loads(event.get("body") or "{}")
+    except ValueError:
+        return _response(400, {"message": "Invalid JSON body"})
+
+    path = event.get("resource") or event.get("path") or ""
+    if path.endswith("/complete"):
+        doc_id = (event.get("pathParameters") or {}).get("id")
+        return handle_complete(user_id, doc_id, body)
+    if body.get("base64File"):
+        # Legacy inline upload, kept for API clients that still send base64 JSON
+        return handle_inline_upload(user_id, body)
+    return handle_initiate(user_id, body)
+
+
+def handle_initiate(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Create the document row and hand out presigned URLs for a direct S3 upload"""
+    filename = body.get("filename", "document.pdf")
+    try:
+        size = int(body.get("size"))
+    except (TypeError, ValueError):
+        return _response(400, {"message": "filename and size required"})
+    if size <= 0:
+        return _response(400, {"message": "size must be positive"})
+    if size > MAX_UPLOAD_BYTES:
+        return _response(400, {"message": f"size exceeds the {MAX_UPLOAD_BYTES} byte limit"})
+
+    document_id = str(uuid.uuid4())
+    object_key = f"uploads/{document_id}/{filename}"
+    params = {"Bucket": DOC_BUCKET, "Key": object_key}
+    item = _document_item(document_id, user_id, filename, body.get("contentType"))
+    item["status"] = "pending_upload"
+    item["objectKey"] = object_key
+
+    if size <= PART_SIZE:
+        url = s3.generate_presigned_url("put_object", Params=params, ExpiresIn=PRESIGN_EXPIRES)
+        DOCUMENTS_TABLE.put_item(Item=item)
+        return _response(
+            200,
+            {"documentId": document_id, "uploadUrl": url, "expiresIn": PRESIGN_EXPIRES},
+        )
+
+    part_size = max(PART_SIZE, math.ceil(size / MAX_PARTS))
+    part_count = math.ceil(size / part_size)
+    upload_id = s3.create_multipart_upload(**params)["UploadId"]
+    part_urls = [
+        s3.generate_presigned_url(
+            "upload_part",
+            Params={**params, "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=PRESIGN_EXPIRES,
+        )
+        for part_number in range(1, part_count + 1)
+    ]
+    item["uploadId"] = upload_id
+    DOCUMENTS_TABLE.put_item(Item=item)
+    return _response(
+        200,
+        {
+            "documentId": document_id,
+            "uploadId": upload_id,
+            "partSize": part_size,
+            "partUrls": part_urls,
+            "expiresIn": PRESIGN_EXPIRES,
+        },
+    )
+
+
+def handle_complete(user_id: str, doc_id: str | None, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Finish a direct upload; S3's ObjectCreated event then triggers extraction"""
+    if not doc_id:
+        return _response(400, {"message": "Missing id"})
+    document = DOCUMENTS_TABLE.get_item(Key={"documentId": doc_id}).get("Item")
+    if not document:
+        return _response(404, {"message": "Document not found"})
+    if document.get("userId") != user_id:
+        return _response(403, {"message": "Access denied to this document"})
+
+    upload_id = document.get("uploadId")
+    if upload_id:
+        parts = _normalise_parts(body.get("parts"))
+        if not parts:
+            return _response(400, {"message": "parts must be a list of {PartNumber, ETag}"})
+        try:
+            s3.complete_multipart_upload(
+                Bucket=DOC_BUCKET,
+                Key=document["objectKey"],
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except ClientError as err:
+            # Wrong ETags, missing or undersized parts, or an aborted upload
+            return _response(400, {"message": err.response["Error"].get("Message", str(err))})
+
+    try:
+        # Extraction may already be running (single PUTs fire the event on upload)
+        DOCUMENTS_TABLE.update_item(
+            Key={"documentId": doc_id},
+            UpdateExpression="SET #docStatus=:status, updatedAt=:ts REMOVE uploadId",
+            ConditionExpression="#docStatus = :pending",
+            ExpressionAttributeNames={"#docStatus": "status"},
+            ExpressionAttributeValues={
+                ":status": "pending_extraction",
+                ":pending": "pending_upload",
+                ":ts": datetime.utcnow().isoformat(),
+            },
+        )
+    except DOCUMENTS_TABLE.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+    return _response(202, {"documentId": doc_id, "status": "queued"})
+
+
+def handle_inline_upload(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
     file_content = body.get("base64File")
     filename = body.get("filename", "document.pdf")
-    if not file_content:
-        return _response(400, {"message": "base64File required"})
 
     try:
         binary_body = base64.b64decode(file_content)
@@ -53,36 +169,52 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
 
     document_id = str(uuid.uuid4())
     object_key = f"uploads/{document_id}/{filename}"
+    # Row first: the object's ObjectCreated event starts extraction right away
+    DOCUMENTS_TABLE.put_item(Item=_document_item(document_id, user_id, filename))
     s3.put_object(Bucket=DOC_BUCKET, Key=object_key, Body=binary_body)
 
+    return _response(202, {"documentId": document_id, "status": "queued"})
+
+
+def _document_item(
+    document_id: str, user_id: str, filename: str, content_type: str | None = None
+) -> Dict[str, Any]:
     upload_timestamp = datetime.utcnow().isoformat()
     file_extension = (
         filename.rsplit(".", 1)[-1].lower() if "." in filename else "unknown"
     )
-    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
-
-    DOCUMENTS_TABLE.put_item(
-        Item={
-            "documentId": document_id,
-            "userId": user_id,  # Associate with user ID
-            "status": "pending_extraction",
-            "filename": filename,
-            "fileType": file_extension,
-            "contentType": content_type,
-            "uploadTimestamp": upload_timestamp,
-        }
+    content_type = (
+        content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
     )
-
-    message = {
+    return {
         "documentId": document_id,
-        "bucket": DOC_BUCKET,
-        "key": object_key,
-        "uploadedAt": upload_timestamp,
+        "userId": user_id,  # Associate with user ID
+        "status": "pending_extraction",
         "filename": filename,
+        "fileType": file_extension,
+        "contentType": content_type,
+        "uploadTimestamp": upload_timestamp,
+        "updatedAt": upload_timestamp,  # Sort key of UserUpdatedAtIndex
     }
-    sqs.send_message(QueueUrl=EXTRACTION_QUEUE, MessageBody=json.dumps(message))
 
-    return _response(202, {"documentId": document_id, "status": "queued"})
+
+def _normalise_parts(parts: Any) -> List[Dict[str, Any]]:
+    """S3's Parts list from the client's, or [] when it is missing or malformed"""
+    if not isinstance(parts, list) or len(parts) > MAX_PARTS:
+        return []
+    normalised = []
+    for part in parts:
+        if not isinstance(part, dict):
+            return []
+        try:
+            number = int(part.get("PartNumber") or part.get("partNumber"))
+        except (TypeError, ValueError):
+            return []
+        etag = part.get("ETag") or part.get("etag")
+        if not isinstance(etag, str) or not etag or not 1 <= number <= MAX_PARTS:
+            return []
+        normalised.append({"PartNumber": number, "ETag": etag})
+    return sorted(normalised, key=lambda p: p["PartNumber"])
 
 
 def _response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
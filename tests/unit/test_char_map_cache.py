@@ -0,0 +1,85 @@
+import copy
+import io
+
+import pytest
+
+# pdf_reference puts the vendored PyPDF2 on sys.path
+from tests.unit.pdf_reference import pdf_file
+from PyPDF2 import PdfReader, _cmap  # noqa: E402
+
+TO_UNICODE = (
+    b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+    b"1 begincodespacerange <00> <FF> endcodespacerange\n"
+    b"2 beginbfchar\n<01> <0048>\n<02> <0069>\nendbfchar\n"
+    b"endcmap CMapName currentdict /CMap defineresource pop end end"
+)
+
+
+def _document(pages=2):
+    """Pages sharing a bare Helvetica (object 3) and a font with a /ToUnicode CMap (object 5)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % (6 + 2 * i) for i in range(pages)), pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(TO_UNICODE), TO_UNICODE),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Custom /FirstChar 0 /LastChar 2"
+        b" /Widths [500 500 500] /ToUnicode 4 0 R >>",
+    ]
+    for i in range(pages):
+        content = b"BT /F1 12 Tf 72 720 Td (Page %d) Tj 0 -14 Td /F2 12 Tf <0102> Tj ET" % i
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792]"
+            b" /Resources << /Font << /F1 3 0 R /F2 5 0 R >> >> /Contents %d 0 R >>" % (7 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+    return pdf_file(objects)
+
+
+@pytest.fixture(autouse=True)
+def standard_char_maps(monkeypatch):
+    shared = {}
+    monkeypatch.setattr(_cmap, "_standard_char_maps", shared)
+    return shared
+
+
+def test_second_extraction_reuses_the_maps():
+    reader = PdfReader(io.BytesIO(_document()))
+    first = reader.pages[0].extract_text()
+    assert "Page 0" in first and "Hi" in first
+    assert reader.char_map_stats == {"hits": 0, "misses": 2}
+    assert reader.pages[0].extract_text() == first
+    assert reader.char_map_stats == {"hits": 2, "misses": 2}
+    assert "Page 1" in reader.pages[1].extract_text()
+    assert reader.char_map_stats == {"hits": 4, "misses": 2}
+
+
+def test_cached_output_matches_uncached_extraction():
+    data = _document(3)
+    cached = PdfReader(io.BytesIO(data))
+    uncached = PdfReader(io.BytesIO(data))
+    uncached.char_maps = None
+    for _ in range(2):
+        assert [p.extract_text() for p in cached.pages] == [p.extract_text() for p in uncached.pages]
+    assert uncached.char_map_stats == {"hits": 0, "misses": 0}
+
+
+def test_standard_fonts_are_shared_between_readers_unchanged(standard_char_maps):
+    first = PdfReader(io.BytesIO(_document()))
+    expected = first.pages[0].extract_text()
+    assert [key[:2] for key in standard_char_maps] == [("/Type1", "/Helvetica")]
+    snapshot = copy.deepcopy(standard_char_maps)
+
+    second = PdfReader(io.BytesIO(_document()))
+    assert second.pages[0].extract_text() == expected
+    # Helvetica comes from the shared maps; the /ToUnicode font is per document
+    assert second.char_map_stats == {"hits": 1, "misses": 1}
+    assert standard_char_maps == snapshot
+
+
+def test_sharing_can_be_turned_off(standard_char_maps, monkeypatch):
+    PdfReader(io.BytesIO(_document())).pages[0].extract_text()
+    monkeypatch.setattr(PdfReader, "share_standard_char_maps", False)
+    reader = PdfReader(io.BytesIO(_document()))
+    reader.pages[0].extract_text()
+    assert reader.char_map_stats == {"hits": 0, "misses": 2}
@@ -0,0 +1,40 @@
+"""The regex content stream tokenizer against PyPDF2's byte-wise parser"""
+# pdf_reference puts the vendored PyPDF2 on sys.path
+from tests.unit.pdf_reference import content_stream_samples
+from PyPDF2.generic import ContentStream, DecodedStreamObject  # noqa: E402
+
+
+def _canonical(value):
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__, [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return type(value).__name__, sorted((_canonical(k), _canonical(v)) for k, v in value.items())
+    if type(value).__name__ == "IndirectObject":
+        return "IndirectObject", value.idnum, value.generation
+    if type(value).__name__ == "NullObject":
+        return "NullObject", None
+    return type(value).__name__, bytes(value) if isinstance(value, bytes) else value
+
+
+def _operations(data, regex):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    previous = ContentStream.use_regex_tokenizer
+    ContentStream.use_regex_tokenizer = regex
+    try:
+        return _canonical(ContentStream(stream, None).operations)
+    finally:
+        ContentStream.use_regex_tokenizer = previous
+
+
+def test_regex_tokenizer_matches_byte_wise_parser():
+    compared = 0
+    for data in content_stream_samples():
+        try:
+            expected = _operations(data, False)
+        except Exception:
+            # The regex tokenizer is more lenient than the byte-wise parser
+            continue
+        assert _operations(data, True) == expected, data
+        compared += 1
+    assert compared > 100
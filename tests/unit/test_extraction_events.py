@@ -0,0 +1,185 @@
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+EXTRACTION_DIR = Path(__file__).resolve().parents[2] / "services" / "extraction_service"
+sys.path.insert(0, str(EXTRACTION_DIR))
+
+CONTENT = b"Quarterly invoice for services rendered"
+
+
+class ConditionalCheckFailedException(Exception):
+    pass
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_object(self, Bucket, Key):
+        data = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(data), "ContentLength": len(data), "ETag": '"etag"'}
+
+
+class FakeDynamoDb:
+    """Low-level get_item/put_item over tables keyed by their single string key"""
+
+    exceptions = SimpleNamespace(ConditionalCheckFailedException=ConditionalCheckFailedException)
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = []
+
+    def get_item(self, TableName, Key, ProjectionExpression=None):
+        self.calls.append(("get_item", TableName))
+        ((_name, value),) = Key.items()
+        item = self.tables[TableName].get(value["S"])
+        return {"Item": item} if item else {}
+
+    def put_item(self, TableName, Item, ConditionExpression=None):
+        self.calls.append(("put_item", TableName))
+        key = Item["contentHash"]["S"]
+        if key in self.tables[TableName]:
+            raise ConditionalCheckFailedException()
+        self.tables[TableName][key] = Item
+
+
+class FakeProducer:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, queue_url, message, source=None):
+        self.sent.append(message)
+
+
+@pytest.fixture
+def extraction(monkeypatch):
+    pytest.importorskip("boto3")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    spec = importlib.util.spec_from_file_location("extraction_handler", EXTRACTION_DIR / "handler.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    objects = {("docs", f"uploads/{doc_id}/report.txt"): CONTENT for doc_id in ("d1", "d2", "d3", "d4")}
+    owners = {"d1": "u1", "d2": "u1", "d3": "u2"}
+    dynamodb = FakeDynamoDb(
+        {
+            module.DOCUMENTS_TABLE: {doc_id: {"userId": {"S": user}} for doc_id, user in owners.items()},
+            module.CONTENT_HASH_TABLE: {},
+        }
+    )
+    ai_calls = []
+
+    def extract_metadata_with_ai(text, filename, doc_id):
+        ai_calls.append(doc_id)
+        return {
+            "documentId": doc_id,
+            "title": "report",
+            "summary": f"summary of {text[:9]}",
+            "documentType": "invoice",
+            "keywords": ["invoice"],
+            "extractionStatus": "completed",
+            "extractionModel": "test-model",
+        }
+
+    monkeypatch.setattr(module, "s3", FakeS3(objects))
+    monkeypatch.setattr(module, "dynamodb", dynamodb)
+    monkeypatch.setattr(module, "producer", FakeProducer())
+    monkeypatch.setattr(module, "_extract_metadata_with_ai", extract_metadata_with_ai)
+    module.ai_calls = ai_calls
+    return module
+
+
+def _s3_event(*keys, event_name="ObjectCreated:Put"):
+    return {
+        "Records": [
+            {"eventName": event_name, "s3": {"bucket": {"name": "docs"}, "object": {"key": key}}}
+            for key in keys
+        ]
+    }
+
+
+def _record(body, message_id="m1"):
+    return {"messageId": message_id, "body": json.dumps(body)}
+
+
+def test_object_created_keys_are_decoded(extraction):
+    jobs = extraction._extraction_jobs(
+        _s3_event("uploads/d1/Q3+report%20%28final%29.pdf", "uploads/d2/scans/page%2B1.pdf")
+    )
+    assert jobs == [
+        {"bucket": "docs", "key": "uploads/d1/Q3 report (final).pdf", "documentId": "d1",
+         "filename": "Q3 report (final).pdf"},
+        {"bucket": "docs", "key": "uploads/d2/scans/page+1.pdf", "documentId": "d2",
+         "filename": "scans/page+1.pdf"},
+    ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"Event": "s3:TestEvent", "Bucket": "docs"},
+        _s3_event("uploads/d1/a.pdf", event_name="ObjectRemoved:Delete"),
+        _s3_event("other/d1/a.pdf"),
+        _s3_event("uploads/a.pdf"),
+    ],
+)
+def test_other_notifications_yield_no_jobs(extraction, body):
+    assert extraction._extraction_jobs(body) == []
+
+
+def test_legacy_upload_message_is_still_accepted(extraction):
+    body = {"documentId": "d1", "key": "uploads/d1/a.pdf", "userId": "u1"}
+    assert extraction._extraction_jobs(body) == [
+        {"bucket": extraction.BUCKET, "key": "uploads/d1/a.pdf", "documentId": "d1",
+         "filename": "a.pdf", "userId": "u1"}
+    ]
+
+
+def test_identical_content_is_extracted_once_per_user(extraction):
+    content_hash = hashlib.sha256(CONTENT).hexdigest()
+    for number, doc_id in enumerate(("d1", "d2", "d3"), 1):
+        extraction.process_record(_record(_s3_event(f"uploads/{doc_id}/report.txt"), f"m{number}"))
+
+    # d2 reuses d1's extraction; d3 has the same bytes but another owner
+    assert extraction.ai_calls == ["d1", "d3"]
+    assert sorted(extraction.dynamodb.tables[extraction.CONTENT_HASH_TABLE]) == [
+        f"u1#{content_hash}",
+        f"u2#{content_hash}",
+    ]
+    first, reused, other_user = extraction.producer.sent
+    assert reused["deduplicatedFrom"] == "d1" and reused["documentId"] == "d2"
+    assert reused["summary"] == first["summary"] and reused["extractionModel"] == "test-model"
+    assert "deduplicatedFrom" not in other_user
+    assert all(message["contentHash"] == content_hash for message in extraction.producer.sent)
+
+
+def test_heuristic_results_are_not_remembered(extraction, monkeypatch):
+    monkeypatch.setattr(
+        extraction,
+        "_extract_metadata_with_ai",
+        lambda text, filename, doc_id: {"documentId": doc_id, "summary": text[:20]},
+    )
+    extraction.process_record(_record(_s3_event("uploads/d1/report.txt")))
+    assert extraction.dynamodb.tables[extraction.CONTENT_HASH_TABLE] == {}
+
+
+def test_document_without_owner_skips_deduplication(extraction):
+    extraction.process_record(_record(_s3_event("uploads/d4/report.txt")))
+    assert extraction.ai_calls == ["d4"]
+    assert ("get_item", extraction.CONTENT_HASH_TABLE) not in extraction.dynamodb.calls
+    assert extraction.dynamodb.tables[extraction.CONTENT_HASH_TABLE] == {}
+
+
+def test_concurrent_duplicate_keeps_the_first_entry(extraction):
+    extraction.process_record(_record(_s3_event("uploads/d1/report.txt")))
+    entries = dict(extraction.dynamodb.tables[extraction.CONTENT_HASH_TABLE])
+    extraction._remember_extraction(next(iter(entries)), {**extraction.producer.sent[0], "documentId": "d2"})
+    assert extraction.dynamodb.tables[extraction.CONTENT_HASH_TABLE] == entries
@@ -0,0 +1,129 @@
+import json
+import sys
+from email.utils import formatdate
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "shared"))
+
+import llm_client  # noqa: E402
+from llm_client import LlmClient, LlmError  # noqa: E402
+from llm_stub import LlmStub  # noqa: E402
+
+PAYLOAD = {"model": "test-model", "messages": [{"role": "user", "content": "hi"}]}
+
+
+class FakeContext:
+    def __init__(self, remaining_seconds):
+        self.remaining_seconds = remaining_seconds
+
+    def get_remaining_time_in_millis(self):
+        return int(self.remaining_seconds * 1000)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of waiting them out"""
+    delays = []
+    monkeypatch.setattr(llm_client.time, "sleep", delays.append)
+    return delays
+
+
+def _client(stub, **kwargs):
+    return LlmClient("test-key", base_url=stub.base_url, **kwargs)
+
+
+def test_completion_content_is_returned():
+    with LlmStub(responses=[{"category": "invoice"}]) as stub:
+        assert json.loads(_client(stub).chat(PAYLOAD)) == {"category": "invoice"}
+    assert stub.requests == [PAYLOAD]
+
+
+def test_throttling_and_server_errors_are_retried(sleeps):
+    with LlmStub(responses=[(429, {}), (503, {}), {"ok": True}]) as stub:
+        assert json.loads(_client(stub, backoff_seconds=1.0).chat(PAYLOAD)) == {"ok": True}
+    assert len(stub.requests) == 3
+    # Exponential backoff with jitter between 0.5x and 1.5x
+    assert 0.5 <= sleeps[0] <= 1.5 and 1.0 <= sleeps[1] <= 3.0
+
+
+def test_client_errors_are_not_retried(sleeps):
+    with LlmStub(responses=[(400, {})]) as stub:
+        with pytest.raises(LlmError) as err:
+            _client(stub).chat(PAYLOAD)
+    assert err.value.status == 400
+    assert len(stub.requests) == 1 and sleeps == []
+
+
+def test_last_attempt_failure_raises_with_status(sleeps):
+    with LlmStub(responses=[(500, {})] * 3) as stub:
+        with pytest.raises(LlmError) as err:
+            _client(stub, max_attempts=3).chat(PAYLOAD)
+    assert err.value.status == 500
+    assert len(stub.requests) == 3 and len(sleeps) == 2
+
+
+def test_retry_after_takes_precedence_and_is_capped(sleeps):
+    responses = [(429, {"Retry-After": "7"}), (429, {"Retry-After": "90"}), {"ok": True}]
+    with LlmStub(responses=responses) as stub:
+        _client(stub, backoff_seconds=0.01, max_backoff_seconds=20.0).chat(PAYLOAD)
+    assert sleeps == [7.0, 20.0]
+
+
+def test_retry_after_accepts_http_dates():
+    assert llm_client._retry_after_seconds("not a date") is None
+    delay = llm_client._retry_after_seconds(formatdate(llm_client.time.time() + 30, usegmt=True))
+    assert 28 <= delay <= 30
+
+
+def test_no_attempt_starts_past_the_deadline(sleeps):
+    with LlmStub(responses=[{"ok": True}]) as stub:
+        client = _client(stub)
+        client.set_deadline(FakeContext(0.5), reserve_seconds=0)
+        with pytest.raises(LlmError):
+            client.chat(PAYLOAD)
+    assert stub.requests == []
+
+
+def test_backoff_that_would_pass_the_deadline_gives_up(sleeps):
+    with LlmStub(responses=[(429, {"Retry-After": "5"}), {"ok": True}]) as stub:
+        client = _client(stub)
+        client.set_deadline(FakeContext(13), reserve_seconds=10)
+        with pytest.raises(LlmError) as err:
+            client.chat(PAYLOAD)
+    assert err.value.status == 429
+    assert len(stub.requests) == 1 and sleeps == []
+
+
+def test_without_lambda_context_calls_are_not_limited(sleeps):
+    with LlmStub(responses=[(429, {"Retry-After": "5"}), {"ok": True}]) as stub:
+        client = _client(stub)
+        client.set_deadline(None)
+        assert json.loads(client.chat(PAYLOAD)) == {"ok": True}
+    assert sleeps == [5.0]
+
+
+def test_connections_are_reused(sleeps):
+    with LlmStub(responses=[(503, {}), {}, {}]) as stub:
+        client = _client(stub)
+        for _ in range(3):
+            client.chat(PAYLOAD)
+    assert len(stub.requests) == 4
+    assert stub.connections == 1
+
+
+def test_connection_closed_by_the_server_is_replaced(sleeps):
+    with LlmStub(responses=[(503, {"Connection": "close"}), {}, {}]) as stub:
+        client = _client(stub)
+        client.chat(PAYLOAD)
+        client.chat(PAYLOAD)
+    assert len(stub.requests) == 3
+    assert stub.connections == 2
+
+
+def test_missing_api_key_fails_without_a_request():
+    with LlmStub() as stub:
+        with pytest.raises(LlmError):
+            LlmClient(None, base_url=stub.base_url).chat(PAYLOAD)
+    assert stub.requests == []
@@ -0,0 +1,70 @@
+import sys
+from array import array
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "classification_service"))
+
+# local_model imports search_index, which needs boto3
+pytest.importorskip("boto3")
+
+import local_model  # noqa: E402
+
+
+class FixedModel:
+    """predict() returns the category and confidence stored on each item"""
+
+    def predict(self, item):
+        return item["predicted"], item["confidence"]
+
+
+def _scored(*pairs):
+    return [
+        {"category": "invoice", "predicted": "invoice" if hit else "receipt", "confidence": confidence}
+        for confidence, hit in pairs
+    ]
+
+
+@pytest.mark.parametrize(
+    "item, include_unsourced, trusted",
+    [
+        ({"category": "invoice", "classificationSource": "ai"}, False, True),
+        ({"category": "invoice", "classificationSource": "reused"}, False, True),
+        ({"category": "invoice", "classificationSource": "local"}, True, False),
+        ({"category": "invoice", "classificationSource": "fallback"}, True, False),
+        ({"category": "invoice"}, False, False),
+        ({"category": "invoice"}, True, True),
+        ({"classificationSource": "ai"}, True, False),
+    ],
+)
+def test_training_trusts_only_sourced_llm_labels(item, include_unsourced, trusted):
+    assert local_model.is_trusted(item, include_unsourced) is trusted
+
+
+def test_threshold_is_lowest_confidence_meeting_target():
+    items = _scored((0.99, True), (0.97, True), (0.95, True), (0.9, False), (0.8, True), (0.7, False))
+    assert local_model.calibrate_threshold(FixedModel(), items, 0.8) == 0.8
+    assert local_model.calibrate_threshold(FixedModel(), items, 0.9) == 0.95
+    assert local_model.calibrate_threshold(FixedModel(), items, 0.6) == 0.7
+
+
+def test_tied_confidences_are_accepted_together():
+    items = _scored((0.99, True), (0.95, True), (0.95, False))
+    assert local_model.calibrate_threshold(FixedModel(), items, 0.9) == 0.99
+
+
+def test_unreachable_target_raises():
+    with pytest.raises(ValueError):
+        local_model.calibrate_threshold(FixedModel(), _scored((0.99, False)), 0.5)
+    with pytest.raises(ValueError):
+        local_model.calibrate_threshold(FixedModel(), [], 0.5)
+
+
+def test_threshold_round_trips_through_model_file(tmp_path):
+    model = local_model.LocalClassifier(
+        ["invoice"], {}, array("f", [0.0]), array("f", [0.0] * 4), 4, threshold=0.93
+    )
+    path = str(tmp_path / "classifier.bin")
+    model.save(path)
+    assert local_model.LocalClassifier.load(path).threshold == 0.93
@@ -0,0 +1,33 @@
+"""LZWDecode against the str-based PyPDF2 3.0.1 decoder"""
+import random
+
+import pytest
+
+# pdf_reference puts the vendored PyPDF2 on sys.path
+from tests.unit.pdf_reference import legacy_lzw_decode, lzw_encode
+from PyPDF2 import filters  # noqa: E402
+from PyPDF2.errors import PdfReadError  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "plain",
+    [
+        b"",
+        b"A",
+        b"ABABABABABABAB",
+        b"BT /F1 12 Tf (Quarterly report) Tj ET " * 400,
+        bytes(random.Random(0).getrandbits(8) for _ in range(20000)),
+        bytes(range(256)) * 40,
+    ],
+)
+def test_lzw_matches_legacy_decoder(plain):
+    encoded = lzw_encode(plain)
+    assert filters.LZWDecode.decode(encoded) == plain
+    assert legacy_lzw_decode(encoded) == plain
+
+
+def test_lzw_without_stop_code_raises():
+    # As in PyPDF2 3.0.1; the reference copy just stops instead
+    encoded = lzw_encode(b"BT (abc) Tj ET " * 50)
+    with pytest.raises(PdfReadError):
+        filters.LZWDecode.decode(encoded[: len(encoded) // 2])
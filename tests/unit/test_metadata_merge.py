@@ -0,0 +1,63 @@
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "metadata_service"))
+
+from metadata_merge import build_update  # noqa: E402
+
+
+def _assignments(request):
+    """SET clauses with the placeholders resolved, keyed by attribute name"""
+    names = request["ExpressionAttributeNames"]
+    values = request["ExpressionAttributeValues"]
+    resolved = {}
+    for clause in re.split(r", (?=#)", request["UpdateExpression"][len("SET "):]):
+        name, expression = clause.split("=", 1)
+        for placeholder, value in values.items():
+            expression = expression.replace(placeholder, repr(value))
+        for placeholder, attr in names.items():
+            expression = expression.replace(placeholder, attr)
+        resolved[names[name]] = expression
+    return resolved
+
+
+def test_only_given_non_none_attributes_are_set():
+    request = build_update(
+        {"documentId": "d1"},
+        {"documentId": "d1", "title": "Invoice", "summary": None, "status": "done"},
+    )
+    assert request["Key"] == {"documentId": "d1"}
+    assert _assignments(request) == {"status": "'done'", "title": "'Invoice'"}
+    assert "ConditionExpression" not in request
+
+
+def test_keep_existing_uses_if_not_exists():
+    request = build_update(
+        {"documentId": "d1"},
+        {"filename": "a.pdf", "fileType": "pdf", "title": "A"},
+        keep_existing=("filename", "fileType"),
+    )
+    assert _assignments(request) == {
+        "fileType": "if_not_exists(fileType, 'pdf')",
+        "filename": "if_not_exists(filename, 'a.pdf')",
+        "title": "'A'",
+    }
+
+
+def test_reserved_words_go_through_placeholders():
+    request = build_update({"documentId": "d1"}, {"status": "x", "name": "y"})
+    assert "status" not in request["UpdateExpression"]
+    assert sorted(request["ExpressionAttributeNames"].values()) == ["name", "status"]
+
+
+def test_condition_is_passed_through():
+    request = build_update({"documentId": "d1"}, {"title": "A"}, condition="attribute_exists(documentId)")
+    assert request["ConditionExpression"] == "attribute_exists(documentId)"
+
+
+def test_nothing_to_set_raises():
+    with pytest.raises(ValueError):
+        build_update({"documentId": "d1"}, {"documentId": "d1", "title": None})
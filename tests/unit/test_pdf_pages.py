@@ -0,0 +1,87 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "extraction_service"))
+
+# pdf_reference puts the vendored PyPDF2 on sys.path
+from tests.unit.pdf_reference import pdf_file
+from PyPDF2 import PdfReader  # noqa: E402
+from pdf_pages import page_at, page_count  # noqa: E402
+
+
+def _page(label, parent, extra=b""):
+    return b"<< /Type /Page /Parent %d 0 R /Label %d %s >>" % (parent, label, extra)
+
+
+def _nested_tree():
+    """Five pages: [[0, 1], 2, [3, [4]]], with /MediaBox set on the inner nodes"""
+    return pdf_file(
+        [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R 6 0 R 7 0 R] /Count 5 /Rotate 90 >>",
+            b"<< /Type /Pages /Parent 2 0 R /Kids [4 0 R 5 0 R] /Count 2 /MediaBox [0 0 100 100] >>",
+            _page(0, 3),
+            _page(1, 3, b"/MediaBox [0 0 50 50]"),
+            _page(2, 2),
+            b"<< /Type /Pages /Parent 2 0 R /Kids [8 0 R 9 0 R] /Count 2 /MediaBox [0 0 200 200] >>",
+            _page(3, 7),
+            b"<< /Type /Pages /Parent 7 0 R /Kids [10 0 R] /Count 1 >>",
+            _page(4, 9),
+        ]
+    )
+
+
+def _flat_tree(count):
+    kids = b" ".join(b"%d 0 R" % (3 + i) for i in range(count))
+    return pdf_file(
+        [b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [%s] /Count %d /MediaBox [0 0 10 10] >>" % (kids, count)]
+        + [_page(i, 2) for i in range(count)]
+    )
+
+
+@pytest.mark.parametrize("data", [_nested_tree(), _flat_tree(4)], ids=["nested", "flat"])
+def test_pages_match_the_flattened_tree(data):
+    reader = PdfReader(io.BytesIO(data))
+    assert page_count(reader) == len(reader.pages)
+    for index, expected in enumerate(PdfReader(io.BytesIO(data)).pages):
+        page = page_at(reader, index)
+        assert page["/Label"] == index
+        assert page.mediabox == expected.mediabox
+        assert page.rotation == expected.rotation
+
+
+def test_inherited_attributes_come_from_the_nearest_ancestor():
+    reader = PdfReader(io.BytesIO(_nested_tree()))
+    assert [list(page_at(reader, i).mediabox) for i in (0, 1, 3, 4)] == [
+        [0, 0, 100, 100],
+        [0, 0, 50, 50],
+        [0, 0, 200, 200],
+        [0, 0, 200, 200],
+    ]
+    assert page_at(reader, 4).rotation == 90
+
+
+def test_descending_does_not_flatten_the_tree():
+    reader = PdfReader(io.BytesIO(_nested_tree()))
+    page_at(reader, 4)
+    assert reader.flattened_pages is None
+
+
+def test_page_keeps_its_indirect_reference():
+    reader = PdfReader(io.BytesIO(_nested_tree()))
+    assert page_at(reader, 2).indirect_reference.idnum == 6
+
+
+def test_out_of_range_index_raises():
+    reader = PdfReader(io.BytesIO(_nested_tree()))
+    with pytest.raises(IndexError):
+        page_at(reader, 5)
+
+
+def test_wrong_count_falls_back_to_the_flattened_tree():
+    data = _nested_tree().replace(b"/Count 2 /MediaBox [0 0 100 100]", b"/Count 9 /MediaBox [0 0 100 100]")
+    reader = PdfReader(io.BytesIO(data))
+    assert page_at(reader, 2)["/Label"] == 2
@@ -0,0 +1,23 @@
+"""FlateDecode PNG predictors against the per-byte PyPDF2 3.0.1 code"""
+import pytest
+
+# pdf_reference puts the vendored PyPDF2 on sys.path
+from tests.unit.pdf_reference import legacy_png_unpredict, png_sample
+from PyPDF2 import filters  # noqa: E402
+from PyPDF2.errors import PdfReadError  # noqa: E402
+
+
+@pytest.mark.parametrize("filters_used", ["0", "1", "2", "3", "4", "01234"])
+@pytest.mark.parametrize("columns", [1, 3, 64])
+def test_png_predictors_match_legacy(filters_used, columns):
+    data = png_sample(40, columns, filters_used)
+    expected = legacy_png_unpredict(data, columns + 1)
+    assert filters._png_unpredict_python(data, columns + 1) == expected
+    if filters.np is not None:
+        assert filters._png_unpredict_numpy(data, columns + 1) == expected
+
+
+def test_partial_row_is_rejected():
+    data = png_sample(4, 8, "2") + b"\x02\x01"
+    with pytest.raises(PdfReadError):
+        filters.FlateDecode._decode_png_prediction(data, 8, 9)
@@ -0,0 +1,36 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "search_service"))
+
+from ranking import bm25_scores  # noqa: E402
+
+
+def _postings(**docs):
+    return {doc_id: {"tf": tf, "docLength": length} for doc_id, (tf, length) in docs.items()}
+
+
+def test_bm25_orders_by_term_frequency_and_length():
+    ranked = bm25_scores(
+        {"invoice": _postings(a=(1, 10), b=(3, 10), c=(3, 40))}, doc_count=10, avg_length=20
+    )
+    assert [doc_id for doc_id, _score in ranked] == ["b", "c", "a"]
+
+
+def test_bm25_rare_terms_weigh_more_and_all_tokens_are_required():
+    ranked = bm25_scores(
+        {
+            "common": _postings(a=(1, 10), b=(1, 10), c=(1, 10), d=(1, 10)),
+            "rare": _postings(a=(1, 10), b=(2, 10)),
+        },
+        doc_count=4,
+        avg_length=10,
+    )
+    assert [doc_id for doc_id, _score in ranked] == ["b", "a"]
+
+
+def test_bm25_ties_break_on_document_id_and_survive_json():
+    ranked = bm25_scores({"x": _postings(b=(1, 10), a=(1, 10))}, doc_count=2, avg_length=10)
+    assert [doc_id for doc_id, _score in ranked] == ["a", "b"]
+    assert json.loads(json.dumps(ranked)) == [list(pair) for pair in ranked]
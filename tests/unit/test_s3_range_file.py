@@ -0,0 +1,113 @@
+import io
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "extraction_service"))
+
+from s3_range_file import S3RangeFile, open_s3_object  # noqa: E402
+
+BLOCK = 16
+DATA = bytes(random.Random(0).getrandbits(8) for _ in range(10 * BLOCK + 5))
+
+
+class FakeS3:
+    """get_object over an in-memory object, recording every Range requested"""
+
+    def __init__(self, data=DATA):
+        self.data = data
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = (int(bound) for bound in Range[len("bytes="):].split("-"))
+        self.ranges.append((start, end))
+        return {"Body": io.BytesIO(self.data[start:end + 1])}
+
+
+def _file(s3, **kwargs):
+    return S3RangeFile(s3, "bucket", "key", len(s3.data), block_size=BLOCK, **kwargs)
+
+
+def test_random_reads_match_the_object():
+    s3 = FakeS3()
+    remote = open_s3_object(s3, "bucket", "key", len(DATA), block_size=BLOCK)
+    local = io.BytesIO(DATA)
+    rng = random.Random(1)
+    for _ in range(200):
+        offset, whence = rng.choice(
+            [
+                (rng.randrange(len(DATA) + 8), os.SEEK_SET),
+                (-rng.randrange(1, len(DATA)), os.SEEK_END),
+                (rng.randrange(8), os.SEEK_CUR),
+            ]
+        )
+        assert remote.seek(offset, whence) == local.seek(offset, whence)
+        size = rng.choice([1, 3, BLOCK, 3 * BLOCK + 1, -1])
+        assert remote.read(size) == local.read(size)
+    assert remote.read() == local.read()
+
+
+def test_adjacent_missing_blocks_are_fetched_in_one_get():
+    s3 = FakeS3()
+    raw = _file(s3)
+    assert raw.read(4 * BLOCK) == DATA[:4 * BLOCK]
+    assert s3.ranges == [(0, 4 * BLOCK - 1)]
+    raw.seek(2 * BLOCK)
+    raw.read(4 * BLOCK)
+    # Blocks 2-3 are cached; only 4-5 are fetched
+    assert s3.ranges[1:] == [(4 * BLOCK, 6 * BLOCK - 1)]
+    assert raw.stats == {"requests": 2, "bytesFetched": 6 * BLOCK, "hits": 2, "misses": 6}
+
+
+def test_gaps_split_the_fetch_into_runs():
+    s3 = FakeS3()
+    raw = _file(s3)
+    raw.seek(BLOCK)
+    raw.read(BLOCK)
+    raw.seek(0)
+    assert raw.read(3 * BLOCK) == DATA[:3 * BLOCK]
+    assert s3.ranges == [(BLOCK, 2 * BLOCK - 1), (0, BLOCK - 1), (2 * BLOCK, 3 * BLOCK - 1)]
+
+
+def test_least_recently_used_block_is_evicted():
+    s3 = FakeS3()
+    raw = _file(s3, max_blocks=2)
+    for block in (0, 1, 0, 2):
+        raw.seek(block * BLOCK)
+        raw.read(1)
+    assert len(s3.ranges) == 3
+    raw.seek(0)
+    raw.read(1)
+    assert len(s3.ranges) == 3
+    raw.seek(BLOCK)
+    raw.read(1)
+    assert s3.ranges[-1] == (BLOCK, 2 * BLOCK - 1)
+
+
+def test_read_larger_than_the_cache_is_served_whole():
+    s3 = FakeS3()
+    raw = _file(s3, max_blocks=2)
+    assert raw.read(5 * BLOCK) == DATA[:5 * BLOCK]
+
+
+def test_last_block_is_short_and_reads_stop_at_eof():
+    s3 = FakeS3()
+    raw = _file(s3)
+    raw.seek(-3, os.SEEK_END)
+    assert raw.read(10) == DATA[-3:]
+    assert s3.ranges == [(10 * BLOCK, len(DATA) - 1)]
+    assert raw.read(10) == b""
+    assert raw.seek(len(DATA) + 100) == len(DATA) + 100
+    assert raw.read(10) == b""
+    assert len(s3.ranges) == 1
+
+
+def test_invalid_seeks_raise():
+    raw = _file(FakeS3())
+    with pytest.raises(ValueError):
+        raw.seek(-1)
+    with pytest.raises(ValueError):
+        raw.seek(0, 3)
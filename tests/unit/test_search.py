@@ -0,0 +1,90 @@
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SEARCH_DIR = Path(__file__).resolve().parents[2] / "services" / "search_service"
+sys.path.insert(0, str(SEARCH_DIR))
+
+
+@pytest.fixture(scope="module")
+def search_handler():
+    pytest.importorskip("boto3")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    spec = importlib.util.spec_from_file_location("search_handler", SEARCH_DIR / "handler.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.get_user_from_token = lambda _header: {"userId": "u1"}
+    return module
+
+
+def _search(handler, **params):
+    response = handler.lambda_handler({"queryStringParameters": params}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_cursor_round_trip(search_handler):
+    state = {"q": "tax", "f": ["", "pdf", ""], "score": 1.25, "id": "doc-1"}
+    token = search_handler._encode_cursor(state)
+    assert "=" not in token
+    assert search_handler._decode_cursor(token) == state
+
+
+@pytest.mark.parametrize("token", ["%%%", "bm90IGpzb24", "WzFd"])
+def test_undecodable_cursor_is_rejected(search_handler, token):
+    assert search_handler._decode_cursor(token) is None
+
+
+@pytest.mark.parametrize(
+    "query, state",
+    [
+        ("tax", {"q": "tax", "f": ["", "", ""]}),
+        ("tax", {"q": "tax", "f": ["", "", ""], "score": "1", "id": "doc-1"}),
+        ("tax", {"q": "tax", "f": ["", "", ""], "score": True, "id": "doc-1"}),
+        ("tax", {"q": "other", "f": ["", "", ""], "score": 1.0, "id": "doc-1"}),
+        ("", {"q": "", "f": ["", "", ""]}),
+        ("", {"q": "", "f": ["", "", ""], "key": {"documentId": 5}}),
+        ("", {"q": "", "f": ["", "", ""], "key": {"other": "x"}}),
+        ("", {"q": "", "f": ["", "", ""], "key": {"userId": "u1"}}),
+        ("", {"q": "", "f": ["", "", ""], "key": {"userId": "u2", "documentId": "d", "updatedAt": "t"}}),
+    ],
+)
+def test_malformed_cursor_returns_400(search_handler, query, state):
+    status, body = _search(search_handler, q=query, cursor=search_handler._encode_cursor(state))
+    assert status == 400
+    assert body["message"] == "Invalid cursor"
+
+
+def test_limit_is_clamped(search_handler, monkeypatch):
+    page_sizes = []
+
+    def iter_user_documents(_table, _user_id, page_size, start_key):
+        page_sizes.append(page_size)
+        return iter([])
+
+    monkeypatch.setattr(search_handler, "iter_user_documents", iter_user_documents)
+    for limit, expected in (("0", 1), ("-5", 1), ("1000", 200)):
+        status, body = _search(search_handler, limit=limit)
+        assert (status, body["nextCursor"]) == (200, None)
+        assert page_sizes.pop() == expected
+
+
+def test_non_integer_limit_returns_400(search_handler):
+    assert _search(search_handler, limit="ten")[0] == 400
+
+
+def test_listing_cursor_resumes_from_its_key(search_handler, monkeypatch):
+    start_keys = []
+
+    def iter_user_documents(_table, _user_id, page_size, start_key):
+        start_keys.append(start_key)
+        return iter([])
+
+    monkeypatch.setattr(search_handler, "iter_user_documents", iter_user_documents)
+    key = {"userId": "u1", "documentId": "d", "updatedAt": "t"}
+    cursor = search_handler._encode_cursor({"q": "", "f": ["", "", ""], "key": key})
+    assert _search(search_handler, cursor=cursor)[0] == 200
+    assert start_keys == [key]
@@ -0,0 +1,46 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "shared"))
+
+from sqs_batch import process_batch  # noqa: E402
+
+
+def _event(*bodies):
+    return {
+        "Records": [
+            {"messageId": f"m{i}", "body": json.dumps(body)} for i, body in enumerate(bodies)
+        ]
+    }
+
+
+def test_only_failed_records_are_reported():
+    def handle(record):
+        if json.loads(record["body"]).get("fail"):
+            raise ValueError("boom")
+
+    for workers in (1, 4):
+        result = process_batch(_event({}, {"fail": True}, {}, {"fail": True}), handle, max_workers=workers)
+        assert result["batchItemFailures"] == [{"itemIdentifier": "m1"}, {"itemIdentifier": "m3"}]
+        assert json.loads(result["body"]) == {"processed": 2, "failed": 2}
+
+
+def test_clean_batch_reports_no_failures():
+    handled = []
+    result = process_batch(_event({}, {}, {}), handled.append, max_workers=2)
+    assert result["batchItemFailures"] == []
+    assert json.loads(result["body"]) == {"processed": 3, "failed": 0}
+    assert sorted(record["messageId"] for record in handled) == ["m0", "m1", "m2"]
+
+
+def test_record_without_message_id_is_reported_with_empty_identifier():
+    def handle(_record):
+        raise ValueError("boom")
+
+    result = process_batch({"Records": [{"body": "{}"}]}, handle)
+    assert result["batchItemFailures"] == [{"itemIdentifier": ""}]
+
+
+def test_empty_event():
+    assert process_batch({}, lambda _record: None)["batchItemFailures"] == []
@@ -0,0 +1,94 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "shared"))
+
+from sqs_batch import process_batch  # noqa: E402
+from sqs_producer import MAX_BATCH_BYTES, MAX_BATCH_ENTRIES, BufferedSqsProducer  # noqa: E402
+
+
+class FakeSqs:
+    """send_message_batch that rejects entries mentioning `reject` and throttles `transient` ones"""
+
+    def __init__(self, reject=None, transient=0):
+        self.reject = reject
+        self.transient = transient
+        self.calls = []
+        self.sent = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls.append((QueueUrl, len(Entries)))
+        failed = []
+        for entry in Entries:
+            if self.reject is not None and self.reject in entry["MessageBody"]:
+                failed.append({"Id": entry["Id"], "SenderFault": True, "Code": "InvalidMessage"})
+            elif self.transient:
+                self.transient -= 1
+                failed.append({"Id": entry["Id"], "SenderFault": False, "Code": "ServiceUnavailable"})
+            else:
+                self.sent.append(json.loads(entry["MessageBody"]))
+        return {"Successful": [], "Failed": failed}
+
+
+def _event(*bodies):
+    return {
+        "Records": [
+            {"messageId": f"m{i}", "body": json.dumps(body)} for i, body in enumerate(bodies)
+        ]
+    }
+
+
+def test_messages_are_sent_in_batches_per_queue():
+    sqs = FakeSqs()
+    producer = BufferedSqsProducer(sqs, backoff_seconds=0)
+    for i in range(2 * MAX_BATCH_ENTRIES + 3):
+        producer.send("a", {"n": i})
+    producer.send("b", json.dumps({"already": "encoded"}))
+    assert producer.flush() == set()
+    assert sqs.calls == [("a", MAX_BATCH_ENTRIES), ("a", MAX_BATCH_ENTRIES), ("a", 3), ("b", 1)]
+    assert producer.flush() == set() and len(sqs.calls) == 4
+
+
+def test_batches_stay_under_the_size_limit():
+    sqs = FakeSqs()
+    producer = BufferedSqsProducer(sqs, backoff_seconds=0)
+    for _ in range(3):
+        producer.send("a", {"pad": "x" * (MAX_BATCH_BYTES // 2)})
+    producer.flush()
+    assert [count for _queue, count in sqs.calls] == [1, 1, 1]
+
+
+def test_transient_failures_are_retried():
+    sqs = FakeSqs(transient=2)
+    producer = BufferedSqsProducer(sqs, backoff_seconds=0)
+    for i in range(3):
+        producer.send("a", {"n": i}, source=f"m{i}")
+    assert producer.flush() == set()
+    assert sorted(message["n"] for message in sqs.sent) == [0, 1, 2]
+    assert [count for _queue, count in sqs.calls] == [3, 2]
+
+
+def test_messages_of_failed_records_are_dropped():
+    sqs = FakeSqs()
+    producer = BufferedSqsProducer(sqs, backoff_seconds=0)
+
+    def handle(record):
+        body = json.loads(record["body"])
+        producer.send("queue", {"from": record["messageId"]}, source=record["messageId"])
+        if body.get("fail"):
+            raise ValueError("boom")
+
+    result = process_batch(_event({}, {"fail": True}), handle, producer=producer)
+    assert result["batchItemFailures"] == [{"itemIdentifier": "m1"}]
+    assert sqs.sent == [{"from": "m0"}]
+
+
+def test_undelivered_messages_fail_their_record():
+    producer = BufferedSqsProducer(FakeSqs(reject="m1"), backoff_seconds=0)
+
+    def handle(record):
+        producer.send("queue", {"from": record["messageId"]}, source=record["messageId"])
+
+    result = process_batch(_event({}, {}, {}), handle, max_workers=3, producer=producer)
+    assert result["batchItemFailures"] == [{"itemIdentifier": "m1"}]
@@ -0,0 +1,44 @@
+"""Operator-filtered content stream parsing against a full parse filtered afterwards"""
+import pytest
+
+# pdf_reference puts the vendored PyPDF2 on sys.path
+from tests.unit.pdf_reference import content_stream_samples
+from PyPDF2._page import TEXT_OPERATORS  # noqa: E402
+from PyPDF2.generic import ContentStream, DecodedStreamObject  # noqa: E402
+
+
+def _stream(data):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return stream
+
+
+@pytest.mark.parametrize("operators", [TEXT_OPERATORS, {b"BI", b"Tj"}, set()])
+def test_filtered_parse_matches_full_parse(operators):
+    compared = 0
+    for data in content_stream_samples():
+        try:
+            full = ContentStream(_stream(data), None).operations
+        except Exception:
+            continue
+        # Inline images are parsed as "BI" and reported as "INLINE IMAGE"
+        wanted = set(operators) | ({b"INLINE IMAGE"} if b"BI" in operators else set())
+        expected = [(operands, op) for operands, op in full if op in wanted]
+        filtered = ContentStream(_stream(data), None, None, operators).operations
+        assert repr(filtered) == repr(expected), data
+        compared += 1
+    assert compared > 100
+
+
+def test_operator_filter_keeps_only_requested_operations():
+    stream = _stream(b"q 0.5 w 10 20 m 30 40 l S BT /F1 9 Tf (x) Tj ET Q")
+    operations = ContentStream(stream, None, None, {b"Tf", b"Tj"}).operations
+    assert [operator for _operands, operator in operations] == [b"Tf", b"Tj"]
+
+
+def test_inline_image_is_skipped_unless_requested():
+    data = b"BI /W 1 /H 1 ID \x00 EI BT (after) Tj ET"
+    skipped = ContentStream(_stream(data), None, None, {b"Tj"}).operations
+    assert [op for _operands, op in skipped] == [b"Tj"]
+    kept = ContentStream(_stream(data), None, None, {b"BI", b"Tj"}).operations
+    assert [op for _operands, op in kept] == [b"INLINE IMAGE", b"Tj"]
@@ -0,0 +1,129 @@
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+UPLOAD_DIR = Path(__file__).resolve().parents[2] / "services" / "upload_service"
+sys.path.insert(0, str(UPLOAD_DIR))
+
+
+class FakeS3:
+    def __init__(self):
+        self.completed = []
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3.test/{operation}/{Params.get('PartNumber', 0)}"
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {"UploadId": "upload-1"}
+
+    def complete_multipart_upload(self, **kwargs):
+        self.completed.append(kwargs)
+
+
+class FakeTable:
+    def __init__(self, item=None):
+        self.item = item
+        self.put = []
+
+    def put_item(self, Item):
+        self.put.append(Item)
+
+    def get_item(self, Key):
+        return {"Item": self.item} if self.item else {}
+
+    def update_item(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def upload_handler(monkeypatch):
+    pytest.importorskip("boto3")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    spec = importlib.util.spec_from_file_location("upload_handler", UPLOAD_DIR / "handler.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "get_user_from_token", lambda _header: {"userId": "u1"})
+    monkeypatch.setattr(module, "s3", FakeS3())
+    monkeypatch.setattr(
+        module,
+        "DOCUMENTS_TABLE",
+        FakeTable({"userId": "u1", "uploadId": "upload-1", "objectKey": "uploads/d1/a.pdf"}),
+    )
+    return module
+
+
+def _post(handler, body, path="/documents", doc_id=None):
+    event = {"resource": path, "body": json.dumps(body), "pathParameters": {"id": doc_id}}
+    response = handler.lambda_handler(event, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.mark.parametrize("size", [None, "big", 0, -1])
+def test_initiate_rejects_missing_or_non_positive_size(upload_handler, size):
+    assert _post(upload_handler, {"filename": "a.pdf", "size": size})[0] == 400
+    assert upload_handler.DOCUMENTS_TABLE.put == []
+
+
+def test_initiate_rejects_size_over_the_limit(upload_handler):
+    status, body = _post(upload_handler, {"filename": "a.pdf", "size": upload_handler.MAX_UPLOAD_BYTES + 1})
+    assert status == 400 and "limit" in body["message"]
+    assert upload_handler.DOCUMENTS_TABLE.put == []
+
+
+def test_initiate_at_the_limit_stays_within_part_and_payload_limits(upload_handler):
+    status, body = _post(upload_handler, {"filename": "a.pdf", "size": upload_handler.MAX_UPLOAD_BYTES})
+    assert status == 200
+    assert len(body["partUrls"]) * body["partSize"] >= upload_handler.MAX_UPLOAD_BYTES
+    assert len(body["partUrls"]) <= upload_handler.MAX_PARTS
+    assert len(json.dumps(body)) < 6 * 1024 * 1024
+
+
+def test_small_file_gets_a_single_url(upload_handler):
+    status, body = _post(upload_handler, {"filename": "a.pdf", "size": 1024})
+    assert status == 200 and "uploadUrl" in body and "partUrls" not in body
+
+
+@pytest.mark.parametrize(
+    "parts",
+    [
+        None,
+        [],
+        "1:etag",
+        {"PartNumber": 1, "ETag": "e"},
+        ["etag"],
+        [{"PartNumber": 1}],
+        [{"PartNumber": "x", "ETag": "e"}],
+        [{"PartNumber": 0, "ETag": "e"}],
+        [{"PartNumber": 1, "ETag": ["e"]}],
+    ],
+)
+def test_complete_rejects_malformed_parts(upload_handler, parts):
+    status, _body = _post(upload_handler, {"parts": parts}, path="/documents/{id}/complete", doc_id="d1")
+    assert status == 400
+    assert upload_handler.s3.completed == []
+
+
+def test_complete_sorts_and_normalises_parts(upload_handler):
+    parts = [{"partNumber": "2", "etag": "b"}, {"PartNumber": 1, "ETag": "a"}]
+    status, _body = _post(upload_handler, {"parts": parts}, path="/documents/{id}/complete", doc_id="d1")
+    assert status == 202
+    assert upload_handler.s3.completed[0]["MultipartUpload"] == {
+        "Parts": [{"PartNumber": 1, "ETag": "a"}, {"PartNumber": 2, "ETag": "b"}]
+    }
+
+
+def test_complete_reports_s3_rejection_as_400(upload_handler):
+    from botocore.exceptions import ClientError
+
+    def reject(**_kwargs):
+        raise ClientError({"Error": {"Code": "InvalidPart", "Message": "Part not found"}}, "CompleteMultipartUpload")
+
+    upload_handler.s3.complete_multipart_upload = reject
+    status, body = _post(
+        upload_handler, {"parts": [{"PartNumber": 1, "ETag": "a"}]}, path="/documents/{id}/complete", doc_id="d1"
+    )
+    assert (status, body["message"]) == (400, "Part not found")